@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Address Autocomplete Index for Legacy Compass
+Builds a compact prefix index over normalized property addresses and owner
+names so search-as-you-type is a binary search instead of a linear scan.
+
+The artifact (address_index.json) holds sorted key arrays with APN postings:
+  {"version": 1, "apns": [...],
+   "address": {"keys": [...], "postings": [[apn_idx, ...], ...]},
+   "owner":   {"keys": [...], "postings": [[apn_idx, ...], ...]}}
+
+Usage:
+  python address_index.py build [--snapshot hayward_properties.json] [--out address_index.json]
+  python address_index.py lookup <prefix> [--index address_index.json]
+"""
+
+import argparse
+import json
+import time
+from bisect import bisect_left, insort
+
+from process_county_data import normalize_address, normalize_name
+
+INDEX_VERSION = 1
+FIELDS = ('address', 'owner')
+
+def address_keys(address):
+    """Full normalized address plus the street without its house number"""
+    addr = normalize_address(address)
+    if not addr:
+        return set()
+    keys = {addr}
+    parts = addr.split(' ', 1)
+    if len(parts) == 2 and parts[0][:1].isdigit():
+        keys.add(parts[1])
+    return keys
+
+def owner_keys(owner):
+    """Full normalized owner name plus each name token (LAST or FIRST)"""
+    name = normalize_name(owner)
+    if not name:
+        return set()
+    return {name, *name.split()}
+
+KEY_FUNCS = {
+    'address': lambda prop: address_keys(prop.get('property_address_raw') or prop.get('property_address')),
+    'owner': lambda prop: owner_keys(prop.get('owner_name'))
+}
+
+class AddressIndex:
+    """Sorted-array prefix index with APN postings"""
+
+    def __init__(self, apns=None, sections=None):
+        self.apns = apns or []
+        self.apn_ids = {apn: i for i, apn in enumerate(self.apns)}
+        self.sections = sections or {field: {'keys': [], 'postings': []} for field in FIELDS}
+
+    @classmethod
+    def build(cls, properties):
+        """Build from processed property dicts in one pass"""
+        apns = []
+        postings = {field: {} for field in FIELDS}
+        for prop in properties:
+            apn_id = len(apns)
+            apns.append(prop['apn'])
+            for field in FIELDS:
+                for key in KEY_FUNCS[field](prop):
+                    postings[field].setdefault(key, []).append(apn_id)
+
+        sections = {}
+        for field in FIELDS:
+            keys = sorted(postings[field])
+            sections[field] = {'keys': keys, 'postings': [postings[field][k] for k in keys]}
+        return cls(apns, sections)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version {data.get('version')} in {path}")
+        return cls(data['apns'], {field: data[field] for field in FIELDS})
+
+    def save(self, path):
+        # No timestamp: identical data must give identical bytes so the published
+        # artifact keeps its content hash
+        with open(path, 'w') as f:
+            json.dump({
+                'version': INDEX_VERSION,
+                'apns': self.apns,
+                **self.sections
+            }, f, separators=(',', ':'))
+
+    def lookup(self, prefix, limit=10, fields=FIELDS):
+        """
+        Prefix search across fields
+        Returns up to `limit` matches as {'apn', 'field', 'match'}, one per APN
+        """
+        results = []
+        seen = set()
+        for field in fields:
+            prefix_key = normalize_address(prefix) if field == 'address' else normalize_name(prefix)
+            if not prefix_key:
+                continue
+            keys = self.sections[field]['keys']
+            postings = self.sections[field]['postings']
+            i = bisect_left(keys, prefix_key)
+            while i < len(keys) and keys[i].startswith(prefix_key):
+                for apn_id in postings[i]:
+                    if apn_id not in seen:
+                        seen.add(apn_id)
+                        results.append({'apn': self.apns[apn_id], 'field': field, 'match': keys[i]})
+                        if len(results) >= limit:
+                            return results
+                i += 1
+        return results
+
+    def _remove_key(self, field, key, apn_id):
+        section = self.sections[field]
+        i = bisect_left(section['keys'], key)
+        if i < len(section['keys']) and section['keys'][i] == key and apn_id in section['postings'][i]:
+            section['postings'][i].remove(apn_id)
+            if not section['postings'][i]:
+                del section['keys'][i]
+                del section['postings'][i]
+
+    def _add_key(self, field, key, apn_id):
+        section = self.sections[field]
+        i = bisect_left(section['keys'], key)
+        if i < len(section['keys']) and section['keys'][i] == key:
+            if apn_id not in section['postings'][i]:
+                insort(section['postings'][i], apn_id)
+        else:
+            section['keys'].insert(i, key)
+            section['postings'].insert(i, [apn_id])
+
+    def update_property(self, apn, old_values=None, new_values=None):
+        """
+        Incrementally re-key one property
+        old_values/new_values are dicts with property_address and/or owner_name
+        """
+        if apn not in self.apn_ids:
+            self.apn_ids[apn] = len(self.apns)
+            self.apns.append(apn)
+        apn_id = self.apn_ids[apn]
+
+        for field in FIELDS:
+            old_keys = KEY_FUNCS[field](old_values) if old_values else set()
+            new_keys = KEY_FUNCS[field](new_values) if new_values else set()
+            for key in old_keys - new_keys:
+                self._remove_key(field, key, apn_id)
+            for key in new_keys - old_keys:
+                self._add_key(field, key, apn_id)
+
+    def apply_monthly_updates(self, updates):
+        """
+        Apply the updates dict from monthly_update.check_for_updates()
+        New properties add keys; title transfers move the owner keys
+        """
+        changed = 0
+        for prop in updates.get('new_properties', []):
+            self.update_property(prop['apn'], None, {
+                'property_address': prop.get('address'),
+                'owner_name': prop.get('owner')
+            })
+            changed += 1
+        for transfer in updates.get('title_transfers', []):
+            self.update_property(transfer['apn'],
+                                 {'owner_name': transfer.get('old_owner')},
+                                 {'owner_name': transfer.get('new_owner')})
+            changed += 1
+        return changed
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the address autocomplete index')
+    parser.add_argument('mode', choices=['build', 'lookup'])
+    parser.add_argument('prefix', nargs='?', default='')
+    parser.add_argument('--snapshot', default='hayward_properties.json')
+    parser.add_argument('--index', '--out', dest='index', default='address_index.json')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.mode == 'build':
+        print("Building address autocomplete index...")
+        with open(args.snapshot, 'r') as f:
+            properties = json.load(f)['properties']
+        start = time.perf_counter()
+        index = AddressIndex.build(properties)
+        index.save(args.index)
+        print(f"✅ Indexed {len(index.apns):,} properties "
+              f"({len(index.sections['address']['keys']):,} address keys, "
+              f"{len(index.sections['owner']['keys']):,} owner keys) "
+              f"in {time.perf_counter() - start:.2f}s → {args.index}")
+        return
+
+    index = AddressIndex.load(args.index)
+    start = time.perf_counter()
+    results = index.lookup(args.prefix, args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for r in results:
+        print(f"  {r['apn']:<20} {r['field']:<8} {r['match']}")
+    print(f"\n{len(results)} matches in {elapsed:.3f} ms")
+
+if __name__ == '__main__':
+    main()
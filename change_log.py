@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Change-Event Log for Legacy Compass
+Append-only store of every monthly change (new properties, title transfers,
+value and vacancy changes), replacing the one-file-per-run update_log_YYYYMMDD.json.
+
+Events live in JSON-lines segments under change_log/. Each segment has a
+sidecar index (segment_NNNNNN.idx.json) with byte offsets by APN and by ZIP,
+plus the segment's time range, so per-parcel history and "transfers in a ZIP
+since a date" read only the matching lines instead of scanning every log.
+
+Usage:
+  python change_log.py history <apn>
+  python change_log.py query [--type title_transfer] [--zip 94544] [--since 2026-01-01]
+  python change_log.py compact [--before 2024-01-01]
+  python change_log.py import update_log_*.json
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+from bisect import bisect_left, insort
+from datetime import datetime
+
+LOG_DIR = 'change_log'
+SEGMENT_MAX_EVENTS = 100000
+COMPACT_TARGET_EVENTS = 500000
+
+# updates-dict key (monthly_update.py / snapshot_diff.py) -> event type
+EVENT_TYPES = {
+    'new_properties': 'new_property',
+    'removed_properties': 'removed_property',
+    'title_transfers': 'title_transfer',
+    'value_changes': 'value_change',
+    'vacant_changes': 'vacant_change'
+}
+
+SEGMENT_RE = re.compile(r'^segment_(\d{6})\.jsonl$')
+
+# compact() builds merged segments in COMPACT_DIR, then writes COMPACT_INTENT
+# (which files to install and which to remove) before touching the live log.
+# ChangeLog() finishes a swap that has an intent file and discards one without.
+COMPACT_DIR = 'compact.tmp'
+COMPACT_INTENT = 'compact.intent.json'
+
+def segment_name(num):
+    return f'segment_{num:06d}.jsonl'
+
+class Segment:
+    """One JSON-lines file plus its APN/ZIP offset index"""
+
+    def __init__(self, log_dir, num):
+        self.num = num
+        self.path = os.path.join(log_dir, segment_name(num))
+        self.index_path = self.path[:-len('.jsonl')] + '.idx.json'
+        self.count = 0
+        self.size = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.by_apn = {}
+        self.by_zip = {}   # zip -> [[ts, offset], ...] sorted by time
+
+    def _add_to_index(self, event, offset):
+        self.count += 1
+        self.first_ts = min(self.first_ts or event['ts'], event['ts'])
+        self.last_ts = max(self.last_ts or event['ts'], event['ts'])
+        self.by_apn.setdefault(event['apn'], []).append(offset)
+        if event.get('zip_code'):
+            # Appends are normally in time order, so this is an append at the end
+            insort(self.by_zip.setdefault(event['zip_code'], []), [event['ts'], offset])
+
+    def load_index(self):
+        """Load the sidecar index, rebuilding it if it is missing or behind the data"""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+            if data.get('size') == size:
+                self.count, self.size = data['count'], data['size']
+                self.first_ts, self.last_ts = data['first_ts'], data['last_ts']
+                self.by_apn, self.by_zip = data['apn'], data['zip']
+                return self
+        return self.rebuild_index()
+
+    def rebuild_index(self):
+        """Scan the segment once and rewrite its index (recovery after a crash)"""
+        self.__init__(os.path.dirname(self.path), self.num)
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    if line.strip():
+                        self._add_to_index(json.loads(line), offset)
+                    offset += len(line)
+                self.size = offset
+        self.save_index()
+        return self
+
+    def save_index(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({
+                'count': self.count,
+                'size': self.size,
+                'first_ts': self.first_ts,
+                'last_ts': self.last_ts,
+                'apn': self.by_apn,
+                'zip': self.by_zip
+            }, f, separators=(',', ':'))
+        os.replace(tmp, self.index_path)
+
+    def append(self, events):
+        """Append events and update the index in one write"""
+        lines = [(json.dumps(e, separators=(',', ':')) + '\n').encode('utf-8') for e in events]
+        with open(self.path, 'ab') as f:
+            for event, line in zip(events, lines):
+                self._add_to_index(event, self.size)
+                f.write(line)
+                self.size += len(line)
+        self.save_index()
+
+    def read_at(self, offsets):
+        """Read the events at the given byte offsets"""
+        events = []
+        with open(self.path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                events.append(json.loads(f.readline()))
+        return events
+
+    def scan(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+class ChangeLog:
+    """Segmented append-only event store with APN, ZIP and time indexes"""
+
+    def __init__(self, log_dir=LOG_DIR):
+        self.log_dir = log_dir
+        os.makedirs(log_dir, exist_ok=True)
+        self._recover_compaction()
+        nums = sorted(int(m.group(1)) for m in map(SEGMENT_RE.match, os.listdir(log_dir)) if m)
+        self.segments = [Segment(log_dir, n).load_index() for n in nums]
+
+    def _recover_compaction(self):
+        """Finish or roll back a compact() that was interrupted"""
+        staging = os.path.join(self.log_dir, COMPACT_DIR)
+        intent_path = os.path.join(self.log_dir, COMPACT_INTENT)
+        if os.path.exists(intent_path):
+            with open(intent_path, 'r') as f:
+                self._finish_compaction(json.load(f))
+        elif os.path.exists(intent_path + '.tmp'):
+            os.remove(intent_path + '.tmp')
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def _finish_compaction(self, intent):
+        """
+        Install the staged segments, then remove the replaced ones
+        Every step can be repeated, so a crash part way is finished on reload
+        """
+        staging = os.path.join(self.log_dir, COMPACT_DIR)
+        for name in intent['install']:
+            if os.path.exists(os.path.join(staging, name)):
+                os.replace(os.path.join(staging, name), os.path.join(self.log_dir, name))
+        for name in intent['remove']:
+            if name not in intent['install'] and os.path.exists(os.path.join(self.log_dir, name)):
+                os.remove(os.path.join(self.log_dir, name))
+        os.remove(os.path.join(self.log_dir, COMPACT_INTENT))
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def _active_segment(self):
+        if not self.segments or self.segments[-1].count >= SEGMENT_MAX_EVENTS:
+            num = self.segments[-1].num + 1 if self.segments else 1
+            self.segments.append(Segment(self.log_dir, num))
+        return self.segments[-1]
+
+    def append(self, events):
+        """Append events, rolling to a new segment when the active one is full"""
+        while events:
+            segment = self._active_segment()
+            room = SEGMENT_MAX_EVENTS - segment.count
+            segment.append(events[:room])
+            events = events[room:]
+
+    def append_updates(self, updates, run_ts=None):
+        """Record one monthly_update/snapshot_diff updates dict as events"""
+        ts = run_ts or datetime.now().isoformat(timespec='seconds')
+        events = []
+        for key, event_type in EVENT_TYPES.items():
+            for change in updates.get(key, []):
+                events.append({'ts': ts, 'type': event_type, **change})
+        self.append(events)
+        return len(events)
+
+    def history(self, apn):
+        """Every event for one APN, oldest first"""
+        events = []
+        for segment in self.segments:
+            offsets = segment.by_apn.get(apn)
+            if offsets:
+                events.extend(segment.read_at(offsets))
+        return events
+
+    def query(self, zip_code=None, since=None, event_type=None):
+        """
+        Events filtered by ZIP, start time and type
+        With a ZIP only the posting list is read; without one, whole segments
+        before `since` are skipped using their time range
+        """
+        since = since or ''
+        events = []
+        for segment in self.segments:
+            if segment.last_ts is None or segment.last_ts < since:
+                continue
+            if zip_code:
+                postings = segment.by_zip.get(zip_code, [])
+                start = bisect_left(postings, [since])
+                matches = segment.read_at([offset for _, offset in postings[start:]])
+            else:
+                matches = (e for e in segment.scan() if e['ts'] >= since)
+            events.extend(e for e in matches if not event_type or e['type'] == event_type)
+        return events
+
+    def compact(self, before=None):
+        """
+        Merge sealed segments into fewer, larger ones
+        Drops exact duplicate events and, with `before`, events older than that date
+        The active (last) segment is left alone. Merged segments are staged and
+        swapped in through an intent file, so a crash never leaves both copies.
+        """
+        if not self.segments:
+            return 0, 0
+        sealed = self.segments[:-1]
+        if len(sealed) < 2 and not before:
+            return 0, 0
+
+        active = self.segments[-1]
+        kept = dropped = 0
+        seen = set()
+        merged = []
+        buffer = []
+        staging = os.path.join(self.log_dir, COMPACT_DIR)
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        # Merged segments are never more than the sealed ones, so numbering from
+        # 1 keeps them all below the active segment
+        next_num = 1
+
+        def flush():
+            nonlocal next_num
+            if not merged or merged[-1].count + len(buffer) > COMPACT_TARGET_EVENTS:
+                merged.append(Segment(staging, next_num))
+                next_num += 1
+            merged[-1].append(buffer)
+            buffer.clear()
+
+        for segment in sealed:
+            for event in segment.scan():
+                key = json.dumps(event, sort_keys=True)
+                if key in seen or (before and event['ts'] < before):
+                    dropped += 1
+                    continue
+                seen.add(key)
+                buffer.append(event)
+                kept += 1
+                if len(buffer) >= SEGMENT_MAX_EVENTS:
+                    flush()
+        if buffer:
+            flush()
+
+        # Commit point: once the intent file exists the swap is always completed
+        intent = {
+            'install': [os.path.basename(p) for m in merged for p in (m.path, m.index_path)],
+            'remove': [os.path.basename(p) for s in sealed for p in (s.path, s.index_path)]
+        }
+        intent_path = os.path.join(self.log_dir, COMPACT_INTENT)
+        with open(intent_path + '.tmp', 'w') as f:
+            json.dump(intent, f)
+        os.replace(intent_path + '.tmp', intent_path)
+        self._finish_compaction(intent)
+
+        self.segments = [Segment(self.log_dir, m.num).load_index() for m in merged] + [active]
+        return kept, dropped
+
+def print_events(events):
+    for e in events:
+        details = {k: v for k, v in e.items() if k not in ('ts', 'type', 'apn')}
+        print(f"  {e['ts'][:10]}  {e['type']:<16} {e['apn']:<16} {json.dumps(details)}")
+    print(f"\n{len(events)} events")
+
+def main():
+    parser = argparse.ArgumentParser(description='Query and maintain the change-event log')
+    parser.add_argument('mode', choices=['history', 'query', 'compact', 'import'])
+    parser.add_argument('args', nargs='*')
+    parser.add_argument('--dir', default=LOG_DIR)
+    parser.add_argument('--zip', default=None)
+    parser.add_argument('--since', default=None, help='ISO date, e.g. 2026-01-01')
+    parser.add_argument('--type', default=None, choices=sorted(EVENT_TYPES.values()))
+    parser.add_argument('--before', default=None, help='compact: drop events older than this date')
+    args = parser.parse_args()
+
+    log = ChangeLog(args.dir)
+
+    if args.mode == 'history':
+        if not args.args:
+            parser.error('history needs an APN')
+        print_events(log.history(args.args[0]))
+
+    elif args.mode == 'query':
+        print_events(log.query(args.zip, args.since, args.type))
+
+    elif args.mode == 'compact':
+        kept, dropped = log.compact(args.before)
+        print(f"✅ Compacted to {len(log.segments)} segments ({kept:,} events kept, {dropped:,} dropped)")
+
+    else:
+        # Migrate old update_log_YYYYMMDD.json files in date order
+        for path in sorted(args.args):
+            match = re.search(r'(\d{4})(\d{2})(\d{2})', os.path.basename(path))
+            run_ts = f"{match.group(1)}-{match.group(2)}-{match.group(3)}T00:00:00" if match else None
+            with open(path, 'r') as f:
+                count = log.append_updates(json.load(f), run_ts)
+            print(f"  {path}: {count:,} events")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Batch Comps for Legacy Compass
+Precomputes comparable sales ("comps") for every parcel so agents get them
+instantly instead of a radius query per request.
+
+Parcels come from the processed county snapshot (location, values) and vendor
+farm lists in the jeff_annaFarm.csv format (beds, baths, building size, last
+sale), merged on normalize_apn(). Candidates are parcels that sold within
+COMPS_MAX_AGE_YEARS.
+
+Coordinates are projected to km and bucketed into a grid with cells one search
+radius wide, so each parcel's candidates are the 3x3 cells around it. Every
+cell is scored as one (subjects x candidates) NumPy block - distance plus
+beds/baths/size/sale-age differences - and the top k are kept with
+argpartition. Results are stored in an .npz sorted by canonical APN, so a
+lookup is one searchsorted.
+
+Usage:
+  python comps.py build [--snapshot hayward_properties.json] [--farm-csv jeff_annaFarm.csv] [--k 5]
+  python comps.py lookup 078c043401900 [--comps comps.npz]
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import time
+from datetime import date
+
+import numpy as np
+
+from lead_scoring import to_number_array, to_date_array
+from process_county_data import normalize_apn
+
+COMPS_PATH = 'comps.npz'
+COMPS_K = 5
+COMPS_RADIUS_KM = 1.0
+COMPS_MAX_AGE_YEARS = 3
+
+# Each term is scaled so 1.0 is "noticeably different"; the score is the root sum of squares
+COMP_SCALES = {
+    'distance': COMPS_RADIUS_KM,   # km
+    'beds': 1.0,                   # bedrooms
+    'baths': 1.0,                  # bathrooms
+    'size': math.log(1.25),        # 25% larger or smaller building
+    'age': 365.0                   # days since the comp sold
+}
+MISSING_PENALTY = 1.0              # per term when the subject or comp lacks the field
+
+SUBJECT_BLOCK = 1024               # subjects scored per NumPy block, bounds memory in dense cells
+
+FIELDS = ['latitude', 'longitude', 'total_value', 'beds', 'baths', 'building_size', 'sale_price']
+
+def load_parcels(properties=(), farm_paths=()):
+    """
+    County snapshot rows and vendor farm rows merged on canonical APN
+    Farm files fill in attributes the county lacks; returns columns sorted by key
+    """
+    slots = {}
+    county_idx = [slots.setdefault(normalize_apn(p['apn']), len(slots)) for p in properties]
+    farm_rows = []
+    for path in farm_paths:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        idx = [slots.setdefault(normalize_apn(r.get('APN / Parcel Number', '')), len(slots)) for r in rows]
+        farm_rows.append((rows, np.array(idx, dtype=np.int64)))
+
+    n = len(slots)
+    cols = {f: np.full(n, np.nan) for f in FIELDS}
+    cols['key'] = np.array(list(slots), dtype=str)
+    cols['apn'] = cols['key'].astype(object)
+    cols['address'] = np.full(n, '', dtype=object)
+    from_county = np.zeros(n, dtype=bool)
+    cols['sale_date'] = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+
+    if properties:
+        idx = np.array(county_idx, dtype=np.int64)
+        cols['apn'][idx] = [p['apn'] for p in properties]
+        from_county[idx] = True
+        cols['address'][idx] = [p.get('property_address_raw') or p.get('property_address', '') for p in properties]
+        for field in ('latitude', 'longitude', 'total_value'):
+            cols[field][idx] = to_number_array([p.get(field) for p in properties])
+
+    for rows, idx in farm_rows:
+        farm = {
+            'latitude': to_number_array([r.get('Latitude') for r in rows]),
+            'longitude': to_number_array([r.get('Longitude') for r in rows]),
+            'total_value': to_number_array([r.get('Market Value (Assessed)') for r in rows]),
+            'beds': to_number_array([r.get('Bedrooms') for r in rows]),
+            'baths': to_number_array([r.get('Baths') for r in rows]),
+            'building_size': to_number_array([r.get('Building Size') for r in rows]),
+            'sale_price': to_number_array([r.get('Purchase Price') for r in rows])
+        }
+        for field, values in farm.items():
+            # County location and value win; the farm list only fills gaps
+            if field in ('latitude', 'longitude', 'total_value'):
+                values = np.where(np.isnan(cols[field][idx]), values, cols[field][idx])
+            cols[field][idx] = values
+        cols['sale_date'][idx] = to_date_array([r.get('Purchase Date', '') for r in rows])
+        no_address = cols['address'][idx] == ''
+        cols['address'][idx[no_address]] = [r.get('Site Address', '') for r, m in zip(rows, no_address) if m]
+        no_county = ~from_county[idx]
+        cols['apn'][idx[no_county]] = [r.get('APN / Parcel Number', '') for r, m in zip(rows, no_county) if m]
+
+    for field in ('beds', 'baths', 'building_size', 'sale_price'):
+        cols[field][cols[field] <= 0] = np.nan
+    order = np.argsort(cols['key'], kind='stable')
+    return {k: v[order] for k, v in cols.items()}
+
+def project_km(lat, lon):
+    """Equirectangular projection around the data's mean latitude - fine at city scale"""
+    lat0 = math.radians(np.nanmean(lat)) if np.isfinite(lat).any() else 0.0
+    return lon * 111.320 * math.cos(lat0), lat * 110.574
+
+def term(diff, scale):
+    """Scaled squared difference, MISSING_PENALTY where either side is unknown"""
+    return np.where(np.isnan(diff), MISSING_PENALTY, (diff / scale) ** 2)
+
+def compute_comps(cols, k=COMPS_K, radius_km=COMPS_RADIUS_KM, max_age_years=COMPS_MAX_AGE_YEARS, today=None):
+    """
+    Top-k comps for every parcel
+    Returns (comp row indices (n, k) with -1 padding, distance km, score)
+    """
+    n = len(cols['key'])
+    today = np.datetime64(today or date.today(), 'D')
+    x, y = project_km(cols['latitude'], cols['longitude'])
+    located = np.isfinite(x) & np.isfinite(y)
+    sold_since = today - np.timedelta64(int(max_age_years * 365), 'D')
+    candidate = located & np.isfinite(cols['sale_price']) & (cols['sale_date'] >= sold_since)
+
+    comps = np.full((n, k), -1, dtype=np.int32)
+    distance = np.full((n, k), np.nan, dtype=np.float32)
+    scores = np.full((n, k), np.nan, dtype=np.float32)
+    if not candidate.any():
+        return comps, distance, scores
+
+    cell = np.full((n, 2), 0, dtype=np.int64)
+    cell[located, 0] = np.floor(x[located] / radius_km)
+    cell[located, 1] = np.floor(y[located] / radius_km)
+    # One int64 key per cell, shifted so neighbor offsets stay non-negative
+    cell -= cell[located].min(axis=0) - 1
+    width = int(cell[located, 1].max()) + 2
+    cell_key = cell[:, 0] * width + cell[:, 1]
+
+    # Candidates sorted by cell, with each cell's [start, end) range
+    cand = np.flatnonzero(candidate)
+    cand = cand[np.argsort(cell_key[cand], kind='stable')]
+    cand_keys, cand_start, cand_count = np.unique(cell_key[cand], return_index=True, return_counts=True)
+    neighbors = np.array([dx * width + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+    log_size = np.log(cols['building_size'])
+    age_days = (today - cols['sale_date']).astype(float)
+
+    subjects = np.flatnonzero(located)
+    subjects = subjects[np.argsort(cell_key[subjects], kind='stable')]
+    subject_keys, subject_start = np.unique(cell_key[subjects], return_index=True)
+    subject_end = np.append(subject_start[1:], len(subjects))
+
+    for key, start, end in zip(subject_keys, subject_start, subject_end):
+        pos = np.searchsorted(cand_keys, key + neighbors)
+        hit = (pos < len(cand_keys)) & (cand_keys[np.minimum(pos, len(cand_keys) - 1)] == key + neighbors)
+        if not hit.any():
+            continue
+        C = np.concatenate([cand[s:s + c] for s, c in zip(cand_start[pos[hit]], cand_count[pos[hit]])])
+        for block in range(start, end, SUBJECT_BLOCK):
+            S = subjects[block:min(block + SUBJECT_BLOCK, end)]
+            score_block(cols, x, y, log_size, age_days, S, C, k, radius_km, comps, distance, scores)
+
+    return comps, distance, scores
+
+def score_block(cols, x, y, log_size, age_days, S, C, k, radius_km, comps, distance, scores):
+    """Score subjects S against candidates C as one matrix and keep each row's top k"""
+    dist = np.hypot(x[S, None] - x[None, C], y[S, None] - y[None, C])
+    score = ((dist / COMP_SCALES['distance']) ** 2
+             + term(cols['beds'][S, None] - cols['beds'][None, C], COMP_SCALES['beds'])
+             + term(cols['baths'][S, None] - cols['baths'][None, C], COMP_SCALES['baths'])
+             + term(log_size[S, None] - log_size[None, C], COMP_SCALES['size'])
+             + (age_days[None, C] / COMP_SCALES['age']) ** 2)
+    score[(dist > radius_km) | (S[:, None] == C[None, :])] = np.inf
+
+    kk = min(k, len(C))
+    top = np.argpartition(score, kk - 1, axis=1)[:, :kk] if kk < len(C) else \
+        np.broadcast_to(np.arange(len(C)), (len(S), len(C)))
+    top_score = np.take_along_axis(score, top, axis=1)
+    order = np.argsort(top_score, axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    top_score = np.take_along_axis(top_score, order, axis=1)
+    found = np.isfinite(top_score)
+
+    comps[S, :kk] = np.where(found, C[top], -1)
+    distance[S, :kk] = np.where(found, np.take_along_axis(dist, top, axis=1), np.nan)
+    scores[S, :kk] = np.where(found, np.sqrt(top_score), np.nan)
+
+def save_comps(path, cols, comps, distance, scores):
+    arrays = {k: (v.astype(str) if v.dtype == object else v) for k, v in cols.items()}
+    np.savez_compressed(path, comps=comps, distance=distance, score=scores, **arrays)
+
+class CompsStore:
+    """Read side of comps.npz - lookups by any APN format"""
+
+    def __init__(self, path=COMPS_PATH):
+        with np.load(path) as data:
+            self.cols = {k: data[k] for k in data.files}
+        self.keys = self.cols['key']
+
+    def row(self, apn):
+        key = normalize_apn(apn)
+        i = np.searchsorted(self.keys, key)
+        return int(i) if i < len(self.keys) and self.keys[i] == key else None
+
+    def describe(self, i):
+        c = self.cols
+        sale = c['sale_date'][i]
+        return {
+            'apn': str(c['apn'][i]),
+            'address': str(c['address'][i]),
+            'beds': None if np.isnan(c['beds'][i]) else float(c['beds'][i]),
+            'baths': None if np.isnan(c['baths'][i]) else float(c['baths'][i]),
+            'building_size': None if np.isnan(c['building_size'][i]) else float(c['building_size'][i]),
+            'sale_price': None if np.isnan(c['sale_price'][i]) else float(c['sale_price'][i]),
+            'sale_date': None if np.isnat(sale) else str(sale)
+        }
+
+    def lookup(self, apn):
+        """Subject details, its comps (best first) and a $/sqft estimate, or None"""
+        i = self.row(apn)
+        if i is None:
+            return None
+        subject = self.describe(i)
+        comps = []
+        for j, dist, score in zip(self.cols['comps'][i], self.cols['distance'][i], self.cols['score'][i]):
+            if j >= 0:
+                comps.append({**self.describe(j), 'distance_km': round(float(dist), 3), 'score': round(float(score), 3)})
+        per_sqft = [c['sale_price'] / c['building_size'] for c in comps if c['building_size']]
+        estimate = None
+        if per_sqft and subject['building_size']:
+            estimate = round(float(np.median(per_sqft)) * subject['building_size'], -3)
+        return {'subject': subject, 'comps': comps, 'estimate': estimate}
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute comparable sales for every parcel')
+    parser.add_argument('mode', choices=['build', 'lookup'])
+    parser.add_argument('apn', nargs='?')
+    parser.add_argument('--snapshot', default=None, help='hayward_properties.json')
+    parser.add_argument('--farm-csv', action='append', default=[], help='jeff_annaFarm.csv format (repeatable)')
+    parser.add_argument('--comps', '--out', dest='comps', default=COMPS_PATH)
+    parser.add_argument('--k', type=int, default=COMPS_K)
+    parser.add_argument('--radius-km', type=float, default=COMPS_RADIUS_KM)
+    parser.add_argument('--max-age-years', type=float, default=COMPS_MAX_AGE_YEARS)
+    args = parser.parse_args()
+
+    if args.mode == 'build':
+        if not args.snapshot and not args.farm_csv:
+            args.snapshot = 'hayward_properties.json'
+        start = time.perf_counter()
+        properties = []
+        if args.snapshot:
+            with open(args.snapshot, 'r') as f:
+                properties = json.load(f)['properties']
+        cols = load_parcels(properties, args.farm_csv)
+        print(f"Loaded {len(cols['key']):,} parcels in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        comps, distance, scores = compute_comps(cols, args.k, args.radius_km, args.max_age_years)
+        elapsed = time.perf_counter() - start
+        with_comps = int((comps[:, 0] >= 0).sum())
+        print(f"⚡ Top-{args.k} comps for {len(comps):,} parcels in {elapsed * 1000:.0f} ms "
+              f"({with_comps:,} have at least one)")
+
+        save_comps(args.comps, cols, comps, distance, scores)
+        print(f"✅ Saved {args.comps} ({os.path.getsize(args.comps) / 1024:,.0f} KB)")
+
+    else:
+        if not args.apn:
+            parser.error('lookup needs an APN')
+        start = time.perf_counter()
+        store = CompsStore(args.comps)
+        result = store.lookup(args.apn)
+        elapsed = (time.perf_counter() - start) * 1000
+        if result is None:
+            print(f"APN {args.apn} not found")
+            return
+        s = result['subject']
+        print(f"🏠 {s['apn']}  {s['address']}  {s['beds']} bd / {s['baths']} ba / {s['building_size']} sqft")
+        for c in result['comps']:
+            print(f"  {c['distance_km']:>5.2f} km  {c['address']:<28} {c['beds']} bd / {c['baths']} ba / "
+                  f"{c['building_size']} sqft  ${c['sale_price'] or 0:,.0f} ({c['sale_date']})")
+        if result['estimate']:
+            print(f"  Estimate from comps: ${result['estimate']:,.0f}")
+        print(f"\n⏱️  {elapsed:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Streaming Data Profiler / Validator for Legacy Compass
+Profiles served datasets (hayward_owners.csv, published JSON partitions, ...)
+without loading them into memory. Local files are read in chunks; URLs are
+fetched with HTTP Range requests when the server supports them, otherwise
+streamed from a single GET.
+
+Full-file stats per column: row count, null rate, approximate distinct count
+(HyperLogLog sketch) and numeric min/max/mean, plus absentee/vacant ratios.
+
+Usage:
+  python data_profiler.py data/hayward_owners.csv
+  python data_profiler.py http://localhost:8080/data/hayward_owners.csv
+  python data_profiler.py --manifest data/parts/manifest.json
+"""
+
+import argparse
+import codecs
+import csv
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+import urllib.request
+import zlib
+from urllib.parse import urljoin
+
+CHUNK_SIZE = 1024 * 1024
+HLL_PRECISION = 12
+MAX_NULL_RATE = 0.5     # validator: flag columns that are mostly empty
+FLAG_COLUMNS = ('is_absentee', 'is_vacant')
+SPARSE_COLUMNS = ('owner_name', 'owner_mailing_address')
+# publish_artifacts.py partitions on this; blank ZIPs all land in 'properties-unknown'
+PARTITION_KEY = 'zip_code'
+
+class HyperLogLog:
+    """Fixed-size distinct-count sketch (~1.6% error at precision 12)"""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        # Python's string hash is SipHash - well mixed and stable within one run,
+        # which is all a single-pass sketch needs
+        h = hash(value) & 0xFFFFFFFFFFFFFFFF
+        idx = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            return round(self.m * math.log(self.m / zeros))
+        return round(estimate)
+
+class ColumnProfile:
+    """Running stats for one column"""
+
+    def __init__(self):
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        self.numeric = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.true = 0
+
+    def add(self, value):
+        if value is None or value == '':
+            self.nulls += 1
+            return
+        if isinstance(value, str):
+            text = value
+            self.distinct.add(text)
+            if text in ('true', 'True', 'TRUE'):
+                self.true += 1
+                return
+            # Only try numbers that look numeric - exceptions are the slow path
+            if text[0] not in '0123456789-.+':
+                return
+            try:
+                number = float(text)
+            except ValueError:
+                return
+        elif isinstance(value, bool):
+            self.distinct.add('true' if value else 'false')
+            self.true += value
+            return
+        elif isinstance(value, (int, float)):
+            self.distinct.add(repr(value))
+            number = float(value)
+        else:
+            self.distinct.add(json.dumps(value, sort_keys=True))
+            return
+        if math.isnan(number):
+            return
+        self.numeric += 1
+        self.total += number
+        self.min = number if self.min is None else min(self.min, number)
+        self.max = number if self.max is None else max(self.max, number)
+
+def read_chunks(source):
+    """
+    Yield raw byte chunks from a path or URL
+    URLs use Range requests when the server advertises byte ranges
+    """
+    if not source.startswith(('http://', 'https://')):
+        with open(source, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    head = urllib.request.urlopen(urllib.request.Request(source, method='HEAD'))
+    size = int(head.headers.get('Content-Length') or 0)
+    ranged = head.headers.get('Accept-Ranges', '').lower() == 'bytes' and size > 0
+    head.close()
+
+    if ranged:
+        for start in range(0, size, CHUNK_SIZE):
+            end = min(start + CHUNK_SIZE, size) - 1
+            request = urllib.request.Request(source, headers={'Range': f'bytes={start}-{end}'})
+            with urllib.request.urlopen(request) as response:
+                if response.status != 206:
+                    raise IOError(f"Server ignored Range request for {source}")
+                yield response.read()
+    else:
+        with urllib.request.urlopen(source) as response:
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+def decoded_chunks(source, digest=None):
+    """Byte chunks -> text chunks, gunzipping .gz sources on the fly"""
+    inflate = zlib.decompressobj(wbits=31) if source.endswith('.gz') else None
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    for chunk in read_chunks(source):
+        if inflate:
+            chunk = inflate.decompress(chunk)
+        if digest:
+            digest.update(chunk)
+        yield decoder.decode(chunk)
+    if inflate:
+        tail = inflate.flush()
+        if digest:
+            digest.update(tail)
+        yield decoder.decode(tail)
+    yield decoder.decode(b'', final=True)
+
+def csv_rows(chunks):
+    """Stream CSV rows as dicts from text chunks"""
+    def lines():
+        buffer = ''
+        for chunk in chunks:
+            buffer += chunk
+            *complete, buffer = buffer.split('\n')
+            for line in complete:
+                yield line + '\n'
+        if buffer:
+            yield buffer
+    return csv.DictReader(lines())
+
+def json_rows(chunks):
+    """
+    Stream objects out of a JSON array (or the 'properties' array of an export)
+    Only the current object and one chunk are held in memory
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ''
+    pos = 0
+
+    def fill():
+        nonlocal buffer, pos
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    # Find the start of the row array
+    while True:
+        key = buffer.find('"properties"', pos)
+        bracket = buffer.find('[', pos)
+        brace = buffer.find('{', pos)
+        if bracket != -1 and (brace == -1 or bracket < brace):
+            pos = bracket + 1
+            break
+        if key != -1:
+            start = buffer.find('[', key)
+            if start != -1:
+                pos = start + 1
+                break
+        if not fill():
+            return
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(buffer):
+            if not fill():
+                return
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if not fill():
+                raise
+            continue
+        pos = end
+        yield obj
+
+def profile(source):
+    """Profile one file or URL in a single streaming pass"""
+    digest = hashlib.sha256()
+    chunks = decoded_chunks(source, digest)
+    is_json = source.split('?')[0].endswith(('.json', '.json.gz'))
+    rows = json_rows(chunks) if is_json else csv_rows(chunks)
+
+    columns = {}
+    count = 0
+    for row in rows:
+        count += 1
+        for name, value in row.items():
+            if name is None:
+                continue
+            col = columns.get(name)
+            if col is None:
+                # Columns first seen late were null in every earlier row
+                col = columns[name] = ColumnProfile()
+                col.nulls = count - 1
+            col.add(value)
+        for name, col in columns.items():
+            if name not in row:
+                col.nulls += 1
+
+    return {
+        'source': source,
+        'rows': count,
+        'sha256': digest.hexdigest(),
+        'columns': {
+            name: {
+                'null_rate': col.nulls / count if count else 0.0,
+                'distinct': col.distinct.count(),
+                'min': col.min,
+                'max': col.max,
+                'mean': col.total / col.numeric if col.numeric else None,
+                'true_rate': col.true / count if count else 0.0
+            } for name, col in columns.items()
+        }
+    }
+
+def validate(result, expected_rows=None, expected_hash=None, sparse_ok=SPARSE_COLUMNS):
+    """
+    Problems found in a profile, empty when the file looks healthy
+    Columns in sparse_ok may be mostly empty
+    """
+    problems = []
+    if result['rows'] == 0:
+        problems.append('no rows')
+    if expected_rows is not None and result['rows'] != expected_rows:
+        problems.append(f"{result['rows']} rows, manifest says {expected_rows}")
+    if expected_hash and result['sha256'] != expected_hash:
+        problems.append('content hash does not match manifest')
+    cols = result['columns']
+    if result['rows'] and not ({'apn', 'property_address'} & set(cols)):
+        problems.append('no apn or property_address column')
+    for name, stats in cols.items():
+        if name in ('apn', 'property_address') and stats['null_rate'] > 0:
+            problems.append(f"{name} is empty in {stats['null_rate']:.1%} of rows")
+        elif stats['null_rate'] > MAX_NULL_RATE and name not in sparse_ok:
+            problems.append(f"{name} is mostly empty ({stats['null_rate']:.0%})")
+    return problems
+
+def print_profile(result, elapsed):
+    print(f"\n📊 {result['source']}")
+    print(f"   Rows: {result['rows']:,} ({elapsed:.2f}s)")
+    for flag in FLAG_COLUMNS:
+        if flag in result['columns']:
+            print(f"   {flag}: {result['columns'][flag]['true_rate']:.1%}")
+    print(f"   {'column':<24}{'null %':>8}{'distinct':>10}{'min':>14}{'max':>14}")
+    for name, s in result['columns'].items():
+        fmt = lambda v: f"{v:,.2f}" if v is not None else '-'
+        print(f"   {name[:23]:<24}{s['null_rate'] * 100:>7.1f}%{s['distinct']:>10,}{fmt(s['min']):>14}{fmt(s['max']):>14}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream-profile and validate served data files')
+    parser.add_argument('sources', nargs='*', help='paths or URLs (.csv, .json, .json.gz)')
+    parser.add_argument('--manifest', default=None, help='validate every partition in a publish_artifacts.py manifest')
+    parser.add_argument('--json', action='store_true', help='print profiles as JSON')
+    args = parser.parse_args()
+
+    targets = [(s, None, None, SPARSE_COLUMNS) for s in args.sources]
+    if args.manifest:
+        if args.manifest.startswith(('http://', 'https://')):
+            with urllib.request.urlopen(args.manifest) as response:
+                manifest = json.load(response)
+            base = args.manifest
+            join = lambda f: urljoin(base, f)
+        else:
+            with open(args.manifest, 'r') as f:
+                manifest = json.load(f)
+            join = lambda f: os.path.join(os.path.dirname(args.manifest), f)
+        for entry in manifest['partitions'].values():
+            # The partition key is empty by construction in the 'unknown' partition
+            targets.append((join(entry['file']), entry['count'], entry['hash'], SPARSE_COLUMNS + (PARTITION_KEY,)))
+
+    if not targets:
+        parser.error('give at least one source or --manifest')
+
+    failed = 0
+    for source, expected_rows, expected_hash, sparse_ok in targets:
+        start = time.perf_counter()
+        result = profile(source)
+        elapsed = time.perf_counter() - start
+        problems = validate(result, expected_rows, expected_hash, sparse_ok)
+        result['problems'] = problems
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print_profile(result, elapsed)
+            for problem in problems:
+                print(f"   ❌ {problem}")
+            if not problems:
+                print("   ✅ Valid")
+        failed += bool(problems)
+
+    if len(targets) > 1 and not args.json:
+        print(f"\n🎯 {len(targets) - failed}/{len(targets)} files valid")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
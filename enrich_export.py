@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Enriched Export for Legacy Compass
+Joins the agent-contributed property_enrichments (phones, emails, tags, notes)
+onto the processed county dataset so exports carry them without a per-property
+API call.
+
+property_enrichments is pulled into the local replica page by page; after the
+first run only rows whose updated_at moved past the stored watermark are
+fetched. The join itself is a hash join: enrichments are aggregated into an
+APN -> summary dict once, then hayward_properties.json is streamed through in
+a single pass (data_profiler.json_rows, one property in memory at a time)
+writing the enriched JSON (and optionally CSV) export.
+
+Usage:
+  python enrich_export.py [--input hayward_properties.json] [--output hayward_properties_enriched.json]
+  python enrich_export.py --csv hayward_properties_enriched.csv
+  python enrich_export.py --offline      # join whatever the replica already has
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+from data_profiler import decoded_chunks, json_rows
+from local_replica import LocalReplica, REPLICA_PATH
+
+ENRICHMENT_TABLE = 'property_enrichments'
+ARRAY_FIELDS = ['phone_numbers', 'email_addresses', 'tags']
+CSV_BASE_COLUMNS = ['apn', 'property_address', 'zip_code', 'owner_name', 'owner_mailing_address',
+                    'is_absentee', 'is_vacant', 'total_value']
+CSV_ENRICHMENT_COLUMNS = ARRAY_FIELDS + ['last_contact_date', 'contact_attempts', 'contributors']
+
+def parse_array(value):
+    """Replica stores TEXT[] columns as JSON text"""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return [value]
+    return parsed if isinstance(parsed, list) else [parsed]
+
+def build_enrichment_table(replica):
+    """
+    Build side of the join: one summary per APN across every agent's rows
+    Arrays are unioned in first-seen order, notes kept per row, counts summed
+    """
+    table = {}
+    rows = replica.db.execute(f"""
+        SELECT apn, user_id, phone_numbers, email_addresses, tags, notes,
+               last_contact_date, contact_attempts, updated_at
+        FROM {ENRICHMENT_TABLE} ORDER BY apn, updated_at""")
+    for row in rows:
+        entry = table.get(row['apn'])
+        if entry is None:
+            entry = table[row['apn']] = {
+                'phone_numbers': [], 'email_addresses': [], 'tags': [], 'notes': [],
+                'last_contact_date': None, 'contact_attempts': 0, 'contributors': 0,
+                'updated_at': None
+            }
+        for field in ARRAY_FIELDS:
+            for value in parse_array(row[field]):
+                if value not in entry[field]:
+                    entry[field].append(value)
+        if row['notes']:
+            entry['notes'].append(row['notes'])
+        if row['last_contact_date'] and (entry['last_contact_date'] or '') < row['last_contact_date']:
+            entry['last_contact_date'] = row['last_contact_date']
+        entry['contact_attempts'] += row['contact_attempts'] or 0
+        entry['contributors'] += 1
+        entry['updated_at'] = max(entry['updated_at'] or '', row['updated_at'] or '') or None
+    return table
+
+def csv_row(prop, enrichment):
+    row = {c: prop.get(c) for c in CSV_BASE_COLUMNS}
+    if enrichment:
+        for field in ARRAY_FIELDS:
+            row[field] = ';'.join(enrichment[field])
+        row['last_contact_date'] = enrichment['last_contact_date']
+        row['contact_attempts'] = enrichment['contact_attempts']
+        row['contributors'] = enrichment['contributors']
+    return row
+
+def write_enriched_exports(properties, enrichments, output_file, csv_file=None):
+    """
+    Probe side of the join: one pass over the processed properties writes
+    every export, each property is serialized as soon as it is matched
+    Returns (total, enriched)
+    """
+    total = enriched = 0
+    writer = None
+    tmp = output_file + '.tmp'
+    with open(tmp, 'w') as out, \
+         (open(csv_file, 'w', newline='') if csv_file else nullcontext()) as csv_out:
+        if csv_out:
+            writer = csv.DictWriter(csv_out, fieldnames=CSV_BASE_COLUMNS + CSV_ENRICHMENT_COLUMNS)
+            writer.writeheader()
+        out.write('{"generated": %s, "properties": [\n' % json.dumps(datetime.now().isoformat()))
+        for prop in properties:
+            enrichment = enrichments.get(prop['apn'])
+            if enrichment:
+                prop = {**prop, 'enrichment': enrichment}
+                enriched += 1
+            out.write((',\n' if total else '') + json.dumps(prop))
+            if writer:
+                writer.writerow(csv_row(prop, enrichment))
+            total += 1
+        out.write('\n], "total_properties": %d, "enriched_properties": %d}\n' % (total, enriched))
+
+    os.replace(tmp, output_file)
+    return total, enriched
+
+def main():
+    parser = argparse.ArgumentParser(description='Join property_enrichments onto the processed export')
+    parser.add_argument('--input', default='hayward_properties.json')
+    parser.add_argument('--output', default='hayward_properties_enriched.json')
+    parser.add_argument('--csv', default=None, help='also write a flat CSV export')
+    parser.add_argument('--db', default=REPLICA_PATH)
+    parser.add_argument('--full', action='store_true', help='re-pull every enrichment instead of changes only')
+    parser.add_argument('--offline', action='store_true', help='skip the sync, use the replica as-is')
+    args = parser.parse_args()
+
+    print("=== ENRICHED EXPORT ===")
+    replica = LocalReplica(args.db)
+
+    if not args.offline:
+        from config import get_client
+
+        since = replica.watermark(ENRICHMENT_TABLE)
+        start = time.perf_counter()
+        pulled = replica.sync_table(get_client(), ENRICHMENT_TABLE, args.full)
+        print(f"🔄 Pulled {pulled:,} enrichments "
+              f"({'full refresh' if args.full or not since else f'changed since {since}'}) "
+              f"in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    enrichments = build_enrichment_table(replica)
+    replica.close()
+    print(f"🧮 {len(enrichments):,} enriched APNs ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    start = time.perf_counter()
+    properties = json_rows(decoded_chunks(args.input))
+    total, enriched = write_enriched_exports(properties, enrichments, args.output, args.csv)
+    print(f"✅ {total:,} properties, {enriched:,} enriched → {args.output}"
+          f"{f' + {args.csv}' if args.csv else ''} ({time.perf_counter() - start:.1f}s)")
+
+if __name__ == '__main__':
+    main()
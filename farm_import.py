@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Bulk Farm List Import for Legacy Compass
+Loads a vendor farm CSV (jeff_annaFarm.csv, the vacant list, ...) into an
+agent's farm in farm_properties.
+
+Vendor APNs don't look like county APNs ('078c043401900', '452-84-78' vs
+'078C-0434-019-00'), so an ApnIndex is built once from the master data keyed by
+normalize_apn(); every row is resolved with one dict lookup, falling back to
+the normalized site address. Resolved rows are written with bulk upserts on
+farm_properties' (farm_id, apn) key, so re-running an import is harmless.
+
+Usage:
+  python farm_import.py jeff_annaFarm.csv --farm-id <uuid> --user-id <uuid>
+  python farm_import.py "jeff list vacant homes csv file.csv" --dry-run
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+
+from process_county_data import normalize_address, normalize_apn
+from local_replica import LocalReplica, REPLICA_PATH
+
+FARM_UPSERT_BATCH = 1000
+HEADER_SCAN_LINES = 5
+
+# Known vendor column names, first match wins
+APN_COLUMNS = ['APN / Parcel Number', 'APN - FORMATTED', 'APN', 'apn', 'Parcel Number']
+ADDRESS_COLUMNS = ['Site Address', 'SITUS STREET ADDRESS', 'property_address', 'Property Address', 'Address']
+
+class ApnIndex:
+    """Canonical APN and normalized address -> master APN"""
+
+    def __init__(self):
+        self.by_apn = {}
+        self.by_address = {}
+        self.ambiguous = set()
+
+    @classmethod
+    def from_properties(cls, properties):
+        """Build from master rows (dicts with apn and property_address)"""
+        index = cls()
+        for prop in properties:
+            apn = prop['apn']
+            index.by_apn.setdefault(normalize_apn(apn), apn)
+            addr = normalize_address(prop.get('property_address_raw') or prop.get('property_address'))
+            if not addr or addr in index.ambiguous:
+                continue
+            if addr in index.by_address and index.by_address[addr] != apn:
+                # Several parcels share this address (condos, lots) - not safe to guess
+                del index.by_address[addr]
+                index.ambiguous.add(addr)
+            else:
+                index.by_address[addr] = apn
+        return index
+
+    def resolve(self, apn, address):
+        """(master APN, how it matched) or (None, None)"""
+        if apn:
+            master = self.by_apn.get(normalize_apn(apn))
+            if master:
+                return master, 'apn'
+        addr = normalize_address(address)
+        if addr and addr in self.by_address:
+            return self.by_address[addr], 'address'
+        return None, None
+
+def load_master(replica_path=REPLICA_PATH, snapshot='hayward_properties.json'):
+    """Master rows from the local replica when it has been synced, else the JSON export"""
+    if os.path.exists(replica_path):
+        replica = LocalReplica(replica_path)
+        rows = replica.query("SELECT apn, property_address FROM master_properties")
+        replica.close()
+        if rows:
+            return rows, replica_path
+    with open(snapshot, 'r') as f:
+        return json.load(f)['properties'], snapshot
+
+def pick_column(fieldnames, candidates):
+    for name in candidates:
+        if name in fieldnames:
+            return name
+    return None
+
+def read_farm_csv(path):
+    """
+    Rows of a vendor CSV as dicts, plus its APN and address columns
+    Some exports put a title line ('Table 1') above the header
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        head = [next(csv.reader([line])) for line in [f.readline() for _ in range(HEADER_SCAN_LINES)] if line]
+        skip = next((i for i, cols in enumerate(head) if pick_column(cols, APN_COLUMNS + ADDRESS_COLUMNS)), None)
+        if skip is None:
+            raise ValueError(f"{path}: no APN or address column in the first {HEADER_SCAN_LINES} lines")
+        f.seek(0)
+        for _ in range(skip):
+            f.readline()
+        reader = csv.DictReader(f)
+        apn_col = pick_column(reader.fieldnames, APN_COLUMNS)
+        addr_col = pick_column(reader.fieldnames, ADDRESS_COLUMNS)
+        return list(reader), apn_col, addr_col
+
+def resolve_farm_rows(index, rows, apn_col, addr_col):
+    """
+    One pass over the farm list
+    Returns (master APNs in file order without duplicates, counts, unresolved rows)
+    """
+    apns = {}
+    counts = {'apn': 0, 'address': 0, 'duplicate': 0, 'unresolved': 0}
+    unresolved = []
+    for row in rows:
+        master, method = index.resolve(row.get(apn_col) if apn_col else None,
+                                       row.get(addr_col) if addr_col else None)
+        if not master:
+            counts['unresolved'] += 1
+            unresolved.append(row)
+        elif master in apns:
+            counts['duplicate'] += 1
+        else:
+            apns[master] = method
+            counts[method] += 1
+    return list(apns), counts, unresolved
+
+def write_farm_properties(supabase, farm_id, user_id, apns):
+    """Bulk upsert into farm_properties, FARM_UPSERT_BATCH rows per request"""
+    for i in range(0, len(apns), FARM_UPSERT_BATCH):
+        batch = [{'farm_id': farm_id, 'user_id': user_id, 'apn': apn} for apn in apns[i:i+FARM_UPSERT_BATCH]]
+        supabase.table('farm_properties').upsert(batch, on_conflict='farm_id,apn').execute()
+
+def main():
+    parser = argparse.ArgumentParser(description='Resolve a vendor farm CSV to master APNs and bulk-load it')
+    parser.add_argument('farm_csv')
+    parser.add_argument('--farm-id', default=None)
+    parser.add_argument('--user-id', default=None)
+    parser.add_argument('--db', default=REPLICA_PATH, help='local replica to read master APNs from')
+    parser.add_argument('--snapshot', default='hayward_properties.json', help='used when the replica is empty')
+    parser.add_argument('--unresolved', default='farm_import_unresolved.csv')
+    parser.add_argument('--dry-run', action='store_true', help='resolve and report only')
+    args = parser.parse_args()
+    if not args.dry_run and not (args.farm_id and args.user_id):
+        parser.error('--farm-id and --user-id are required unless --dry-run')
+
+    print(f"🌾 FARM IMPORT - {args.farm_csv}")
+    start = time.perf_counter()
+    master, source = load_master(args.db, args.snapshot)
+    index = ApnIndex.from_properties(master)
+    print(f"  APN index: {len(index.by_apn):,} parcels, {len(index.by_address):,} addresses "
+          f"from {source} ({time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    rows, apn_col, addr_col = read_farm_csv(args.farm_csv)
+    apns, counts, unresolved = resolve_farm_rows(index, rows, apn_col, addr_col)
+    print(f"  {len(rows):,} rows resolved in {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(f"    by APN: {counts['apn']:,}  by address: {counts['address']:,}  "
+          f"duplicates: {counts['duplicate']:,}  unresolved: {counts['unresolved']:,}")
+
+    if unresolved:
+        with open(args.unresolved, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(unresolved[0].keys()))
+            writer.writeheader()
+            writer.writerows(unresolved)
+        print(f"  ⚠️  Unresolved rows → {args.unresolved}")
+
+    if args.dry_run:
+        return
+
+    from config import get_client
+
+    start = time.perf_counter()
+    write_farm_properties(get_client(), args.farm_id, args.user_id, apns)
+    print(f"✅ Wrote {len(apns):,} farm properties in {time.perf_counter() - start:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -5,28 +5,21 @@ No copy-pasting required!
 """
 
 import json
-import os
 import sys
 import time
 from datetime import datetime
 
-# First, install the supabase library if not already installed
-try:
-    from supabase import create_client, Client
-except ImportError:
-    print("Installing supabase-py library...")
-    os.system("pip3 install supabase")
-    from supabase import create_client, Client
+import config
 
-def load_properties():
+def load_properties(path='hayward_properties.json'):
     """Load properties from the JSON backup"""
     print("Loading properties from JSON backup...")
-    with open('hayward_properties.json', 'r') as f:
+    with open(path, 'r') as f:
         data = json.load(f)
     print(f"Loaded {len(data['properties'])} properties")
     return data['properties']
 
-def batch_insert_properties(supabase: Client, properties, batch_size=100):
+def batch_insert_properties(supabase, properties, batch_size=100):
     """Insert properties in batches"""
     total = len(properties)
     inserted = 0
@@ -125,17 +118,11 @@ def main():
     # Get Supabase credentials
     print("\n📋 Please enter your Supabase credentials")
     print("(You can find these in your Supabase project settings)")
+    print("Press Enter to use the configured project (SUPABASE_URL / SUPABASE_ANON_KEY)")
     print()
     
-    supabase_url = input("Supabase Project URL (e.g., https://xxx.supabase.co): ").strip()
-    if not supabase_url:
-        print("❌ URL is required!")
-        sys.exit(1)
-    
-    supabase_key = input("Supabase Anon Key (starts with 'eyJ...'): ").strip()
-    if not supabase_key:
-        print("❌ Anon key is required!")
-        sys.exit(1)
+    supabase_url = input(f"Supabase Project URL [{config.SUPABASE_URL}]: ").strip() or config.SUPABASE_URL
+    supabase_key = input("Supabase Anon Key (starts with 'eyJ...'): ").strip() or config.SUPABASE_ANON_KEY
     
     # Optional: customize batch size
     batch_size_input = input("\nBatch size (press Enter for default 100): ").strip()
@@ -144,7 +131,12 @@ def main():
     print("\n🔄 Connecting to Supabase...")
     try:
         # Create Supabase client
-        supabase: Client = create_client(supabase_url, supabase_key)
+        try:
+            from supabase import create_client
+        except ImportError:
+            print("❌ The supabase library is not installed - run: pip3 install supabase")
+            sys.exit(1)
+        supabase = create_client(supabase_url, supabase_key)
         
         # Test connection by checking if table exists
         test = supabase.table('master_properties').select('apn').limit(1).execute()
@@ -3,6 +3,11 @@
  * Handles loading and parsing the 68k Hayward properties CSV
  */
 
+// Partitions published by publish_artifacts.py (see service-worker.js)
+const PARTS_BASE = '/data/parts/';
+const PARTS_MANIFEST_KEY = 'hayward_parts_manifest';
+const PARTS_CACHE_NAME = 'legacy-compass-data-v1';
+
 class DataLoader {
     constructor() {
         this.properties = [];
@@ -20,12 +25,17 @@ class DataLoader {
         try {
             console.log(`🚀 Loading Hayward properties (limit: ${limit})...`);
             
-            // Fetch the CSV file
-            const response = await fetch('/data/hayward_owners.csv');
-            const csvText = await response.text();
-            
-            // Parse the CSV with limit for performance
-            this.properties = this.parseCSV(csvText, limit);
+            // Published ZIP partitions first, the raw CSV when none are deployed
+            const partitioned = await this.loadPartitions();
+            if (partitioned) {
+                this.properties = partitioned.slice(0, limit);
+            } else {
+                const response = await fetch('/data/hayward_owners.csv');
+                const csvText = await response.text();
+                
+                // Parse the CSV with limit for performance
+                this.properties = this.parseCSV(csvText, limit);
+            }
             
             console.log(`✅ Loaded ${this.properties.length} properties!`);
             this.loaded = true;
@@ -51,6 +61,97 @@ class DataLoader {
         }
     }
     
+    /**
+     * Load the ZIP partitions written by publish_artifacts.py
+     * Compares the new manifest with the last one seen and only downloads
+     * partitions whose hash changed; unchanged ones come from the data cache
+     * the service worker fills. Returns null when no manifest is published.
+     */
+    async loadPartitions() {
+        let manifest;
+        try {
+            const response = await fetch(PARTS_BASE + 'manifest.json', { cache: 'no-cache' });
+            if (!response.ok) return null;
+            manifest = await response.json();
+        } catch (e) {
+            return null;
+        }
+        
+        let previous = {};
+        try {
+            previous = JSON.parse(localStorage.getItem(PARTS_MANIFEST_KEY) || '{}').partitions || {};
+        } catch (e) {
+            console.warn('Could not read the previous data manifest:', e);
+        }
+        const cache = window.caches ? await caches.open(PARTS_CACHE_NAME) : null;
+        
+        const zips = Object.keys(manifest.partitions);
+        let changed = 0, fetchedBytes = 0, done = 0;
+        const parts = await Promise.all(zips.map(async zip => {
+            const entry = manifest.partitions[zip];
+            const url = PARTS_BASE + entry.file;
+            let response = null;
+            if (previous[zip]?.hash === entry.hash && cache) {
+                response = await cache.match(url);
+            }
+            if (!response) {
+                // The service worker picks the .br/.gz sibling and caches the result
+                response = await fetch(url);
+                if (!response.ok) throw new Error(`${url}: HTTP ${response.status}`);
+                if (cache) await cache.put(url, response.clone());
+                changed++;
+                fetchedBytes += entry.br_bytes || entry.gzip_bytes || entry.bytes;
+            }
+            const rows = await response.json();
+            if (this.onProgress) this.onProgress(++done, zips.length);
+            return rows;
+        }));
+        
+        // Only remember the manifest once every partition it names is in hand
+        localStorage.setItem(PARTS_MANIFEST_KEY, JSON.stringify({ partitions: manifest.partitions }));
+        if (cache) {
+            const current = new Set(zips.map(zip => manifest.partitions[zip].file).concat('manifest.json'));
+            for (const request of await cache.keys()) {
+                const path = new URL(request.url).pathname;
+                if (path.startsWith(PARTS_BASE) && !current.has(path.slice(PARTS_BASE.length))) {
+                    await cache.delete(request);
+                }
+            }
+        }
+        console.log(`📦 ${changed}/${zips.length} data partitions changed ` +
+                    `(${Math.round(fetchedBytes / 1024)} KB downloaded)`);
+        return parts.flat().map((row, i) => this.fromPartitionRow(row, i));
+    }
+    
+    /**
+     * Map a processed-snapshot row (process_county_data.py) to a property object
+     */
+    fromPartitionRow(row, index) {
+        const hasCoords = row.latitude && row.longitude;
+        return {
+            id: row.apn || `prop_${index}`,
+            apn: row.apn,
+            address: row.property_address || '',
+            owner: {
+                name: row.owner_name || 'Unknown',
+                mailing: row.owner_mailing_address || '',
+                type: row.is_absentee ? 'absentee' : 'owner_occupied'
+            },
+            coordinates: hasCoords
+                ? { lat: row.latitude, lng: row.longitude }
+                : this.estimateCoordinates(row.property_address || '', index),
+            financial: {
+                equity: 0,
+                value: row.total_value || 0
+            },
+            activity: {
+                status: 'cold',
+                tags: [],
+                notes: []
+            }
+        };
+    }
+    
     /**
      * Parse CSV text into property objects
      */
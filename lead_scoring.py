@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Lead Scoring Engine for Legacy Compass
+Ranks seller likelihood for every parcel at once using NumPy columns, then
+materializes the top-k parcels per farm.
+
+Parcels come from the processed county snapshot (farm = ZIP code) and/or
+vendor farm lists in the jeff_annaFarm.csv format (farm = file), which add
+sale date, sale price and owner-occupied.
+
+Features are scaled to 0..1 once; a weight change is a single matrix-vector
+product plus a sort, so rescoring the whole county stays well under a second.
+
+Usage:
+  python lead_scoring.py [--snapshot hayward_properties.json] [--farm-csv "Jeff & Anna=jeff_annaFarm.csv"]
+                         [--weights weights.json] [--top 100] [--out lead_scores.json]
+"""
+
+import argparse
+import csv
+import json
+import time
+from datetime import date
+
+import numpy as np
+
+from process_county_data import normalize_address
+
+# Relative importance of each feature; override with --weights
+DEFAULT_WEIGHTS = {
+    'absentee': 3.0,         # owner doesn't live there
+    'vacant': 4.0,           # nobody lives there
+    'not_owner_occupied': 1.0,
+    'tenure': 2.0,           # years since last sale, capped at TENURE_CAP
+    'equity': 1.5,           # value gain over the last sale price
+    'land_share': 1.0,       # land value share of total (teardown/redevelopment)
+}
+FEATURES = list(DEFAULT_WEIGHTS)
+TENURE_CAP = 20.0            # years; anything longer scores as fully tenured
+
+def to_number_array(values):
+    """Strings/None to float64, blanks and junk become NaN"""
+    try:
+        return np.array(['nan' if v in ('', None) else v for v in values], dtype=float)
+    except ValueError:
+        pass
+    out = np.full(len(values), np.nan)
+    for i, v in enumerate(values):
+        try:
+            out[i] = float(v)
+        except (TypeError, ValueError):
+            pass
+    return out
+
+def to_date_array(values):
+    """ISO date strings to datetime64[D], anything unparseable becomes NaT"""
+    cleaned = [v[:10] if v and len(v) >= 10 and v[4] == '-' else 'NaT' for v in values]
+    try:
+        return np.array(cleaned, dtype='datetime64[D]')
+    except ValueError:
+        out = np.full(len(cleaned), np.datetime64('NaT'), dtype='datetime64[D]')
+        for i, v in enumerate(cleaned):
+            try:
+                out[i] = np.datetime64(v, 'D')
+            except ValueError:
+                pass
+        return out
+
+class ParcelColumns:
+    """Column store for scoring - one NumPy array per field"""
+
+    def __init__(self, apn, farm, absentee, vacant, owner_occupied,
+                 land_value, total_value, purchase_date, purchase_price, address):
+        self.apn = np.asarray(apn, dtype=object)
+        self.farm = np.asarray(farm, dtype=object)
+        self.absentee = np.asarray(absentee, dtype=bool)
+        self.vacant = np.asarray(vacant, dtype=bool)
+        self.owner_occupied = np.asarray(owner_occupied, dtype=float)  # 1, 0 or NaN (unknown)
+        self.land_value = np.asarray(land_value, dtype=float)
+        self.total_value = np.asarray(total_value, dtype=float)
+        self.purchase_date = np.asarray(purchase_date, dtype='datetime64[D]')
+        self.purchase_price = np.asarray(purchase_price, dtype=float)
+        self.address = np.asarray(address, dtype=object)
+
+    def __len__(self):
+        return len(self.apn)
+
+    def farm_codes(self):
+        """Unique farm names and each parcel's farm number (computed once)"""
+        if not hasattr(self, '_farm_codes'):
+            self._farm_codes = np.unique(self.farm.astype(str), return_inverse=True)
+        return self._farm_codes
+
+    @classmethod
+    def concat(cls, parts):
+        fields = ['apn', 'farm', 'absentee', 'vacant', 'owner_occupied', 'land_value',
+                  'total_value', 'purchase_date', 'purchase_price', 'address']
+        return cls(*[np.concatenate([getattr(p, f) for p in parts]) for f in fields])
+
+def columns_from_snapshot(properties):
+    """County snapshot rows (process_county_data.py export), farm = ZIP"""
+    n = len(properties)
+    return ParcelColumns(
+        apn=[p['apn'] for p in properties],
+        farm=[f"ZIP {(p.get('zip_code') or 'unknown')[:5]}" for p in properties],
+        absentee=[bool(p.get('is_absentee')) for p in properties],
+        vacant=[bool(p.get('is_vacant')) for p in properties],
+        owner_occupied=np.full(n, np.nan),
+        land_value=to_number_array([p.get('land_value') for p in properties]),
+        total_value=to_number_array([p.get('total_value') for p in properties]),
+        purchase_date=np.full(n, np.datetime64('NaT'), dtype='datetime64[D]'),
+        purchase_price=np.full(n, np.nan),
+        address=[p.get('property_address_raw') or p.get('property_address', '') for p in properties]
+    )
+
+def mails_elsewhere(row):
+    """Farm CSV row whose owner's mailing address is not the site; a blank address is unknown"""
+    mail = normalize_address(row.get('Mail Address'))
+    site = normalize_address(row.get('Site Address'))
+    if not mail or not site:
+        return False
+    mail_zip = (row.get('Mailing Zip Code') or '').strip()[:5]
+    site_zip = (row.get('Site Zip Code') or '').strip()[:5]
+    if mail_zip and site_zip and mail_zip != site_zip:
+        return True
+    # Vendors often drop the unit number on one side ('12 OAK CT 47' vs '12 OAK CT')
+    short, long = sorted((mail, site), key=len)
+    return not (long == short or long.startswith(short + ' '))
+
+def columns_from_farm_csv(path, farm_name):
+    """
+    Vendor farm list in the jeff_annaFarm.csv format, farm = file
+    absentee compares the mailing address to the site address; Owner Occupied
+    only feeds not_owner_occupied, so the two features stay separate signals
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    occupied = [r.get('Owner Occupied', '').strip().upper() for r in rows]
+    market = to_number_array([r.get('Market Value (Assessed)') for r in rows])
+    assessed = to_number_array([r.get('Assessed Value') for r in rows])
+    return ParcelColumns(
+        apn=[r.get('APN / Parcel Number', '').strip() for r in rows],
+        farm=[farm_name] * len(rows),
+        absentee=[mails_elsewhere(r) for r in rows],
+        vacant=np.zeros(len(rows), dtype=bool),
+        owner_occupied=[1.0 if o == 'Y' else 0.0 if o == 'N' else np.nan for o in occupied],
+        land_value=np.full(len(rows), np.nan),
+        total_value=np.where(market > 0, market, assessed),
+        purchase_date=to_date_array([r.get('Purchase Date', '') for r in rows]),
+        purchase_price=to_number_array([r.get('Purchase Price') for r in rows]),
+        address=[r.get('Site Address', '') for r in rows]
+    )
+
+def build_features(cols, today=None):
+    """
+    Scale every feature to 0..1 as one (n, features) matrix
+    Unknown values score 0 so missing data never boosts a parcel
+    """
+    today = np.datetime64(today or date.today(), 'D')
+    years = (today - cols.purchase_date).astype('timedelta64[D]').astype(float) / 365.25
+    total = cols.total_value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        equity = (total - cols.purchase_price) / total
+        land_share = cols.land_value / total
+
+    features = np.column_stack([
+        cols.absentee.astype(float),
+        cols.vacant.astype(float),
+        cols.owner_occupied == 0,
+        np.clip(years / TENURE_CAP, 0, 1),
+        np.clip(equity, 0, 1),
+        np.clip(land_share, 0, 1),
+    ]).astype(float)
+    return np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
+
+def weight_vector(weights):
+    """Dict of weights to a vector normalized so scores land on 0..100"""
+    unknown = set(weights) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown scoring features: {', '.join(sorted(unknown))}")
+    w = np.array([float(weights.get(f, 0.0)) for f in FEATURES])
+    total = w.sum()
+    if total <= 0:
+        raise ValueError("Scoring weights must add up to more than 0")
+    return w * (100.0 / total)
+
+def score(features, weights):
+    """Scores for every parcel in one product"""
+    return features @ weight_vector(weights)
+
+def top_k_per_farm(cols, scores, k):
+    """
+    Rank within each farm and keep the best k
+    One lexsort (farm, -score) then slice each farm's group
+    """
+    farm_codes, farm_index = cols.farm_codes()
+    # lexsort is stable, so ties keep their input order
+    order = np.lexsort((-scores, farm_index))
+    sorted_farms = farm_index[order]
+    starts = np.searchsorted(sorted_farms, np.arange(len(farm_codes)), side='left')
+    ends = np.searchsorted(sorted_farms, np.arange(len(farm_codes)), side='right')
+    return {farm_codes[f]: order[starts[f]:min(ends[f], starts[f] + k)] for f in range(len(farm_codes))}
+
+def explain(features, weights, row):
+    """Per-feature points for one parcel, biggest first"""
+    points = features[row] * weight_vector(weights)
+    return {FEATURES[i]: round(float(points[i]), 1) for i in np.argsort(-points) if points[i] > 0}
+
+def materialize(cols, features, scores, weights, k):
+    """Top-k rankings per farm as plain dicts for JSON"""
+    rankings = {}
+    for farm, rows in top_k_per_farm(cols, scores, k).items():
+        rankings[farm] = [{
+            'rank': rank,
+            'apn': cols.apn[row],
+            'address': cols.address[row],
+            'score': round(float(scores[row]), 1),
+            'reasons': explain(features, weights, row)
+        } for rank, row in enumerate(rows, 1)]
+    return rankings
+
+def main():
+    parser = argparse.ArgumentParser(description='Score seller likelihood and rank the top parcels per farm')
+    parser.add_argument('--snapshot', default=None, help='hayward_properties.json (farms by ZIP)')
+    parser.add_argument('--farm-csv', action='append', default=[], metavar='NAME=PATH',
+                        help='vendor farm list in jeff_annaFarm.csv format (repeatable)')
+    parser.add_argument('--weights', default=None, help='JSON file of feature weights')
+    parser.add_argument('--top', type=int, default=100)
+    parser.add_argument('--out', default='lead_scores.json')
+    args = parser.parse_args()
+
+    if not args.snapshot and not args.farm_csv:
+        args.snapshot = 'hayward_properties.json'
+
+    weights = dict(DEFAULT_WEIGHTS)
+    if args.weights:
+        with open(args.weights, 'r') as f:
+            weights.update(json.load(f))
+
+    print("=== LEGACY COMPASS LEAD SCORING ===")
+    start = time.perf_counter()
+    parts = []
+    if args.snapshot:
+        with open(args.snapshot, 'r') as f:
+            parts.append(columns_from_snapshot(json.load(f)['properties']))
+    for spec in args.farm_csv:
+        name, _, path = spec.rpartition('=')
+        parts.append(columns_from_farm_csv(path, name or path))
+    cols = ParcelColumns.concat(parts) if len(parts) > 1 else parts[0]
+    features = build_features(cols)
+    print(f"Loaded {len(cols):,} parcels in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    scores = score(features, weights)
+    rankings = materialize(cols, features, scores, weights, args.top)
+    elapsed = time.perf_counter() - start
+    print(f"⚡ Scored and ranked {len(cols):,} parcels in {elapsed * 1000:.0f} ms")
+
+    with open(args.out, 'w') as f:
+        json.dump({'weights': weights, 'top': args.top, 'farms': rankings}, f, indent=2)
+
+    print(f"\n🏆 Top leads per farm ({len(rankings)} farms) → {args.out}")
+    for farm, leads in rankings.items():
+        if leads:
+            best = leads[0]
+            print(f"  {farm}: {best['address']} ({best['score']}) - {', '.join(best['reasons'])}")
+
+if __name__ == '__main__':
+    main()
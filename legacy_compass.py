@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Legacy Compass command line
+One entry point for the data scripts. Each subcommand imports its module only
+when it runs, so offline commands never load the Supabase client or NumPy and
+cron runs only pay for what they use.
+
+Usage:
+  legacy-compass process [--county Parcels.csv] [--owners hayward_owners.csv] [--vacant vacant.csv] [--out-dir .]
+                         [--memory-budget 1000000]
+  legacy-compass import [--snapshot hayward_properties.json] [--batch-size 100]
+  legacy-compass monthly-update <new_county_csv>
+  legacy-compass diff <old_csv> <new_csv> [--out changes.jsonl] [--city HAYWARD]
+  legacy-compass bench [--snapshot hayward_properties.json] [--requests 5000]
+
+Credentials and data paths come from config.py (overridable via environment).
+"""
+
+import argparse
+import sys
+import time
+
+def run_module_main(module_name, argv):
+    """Hand the remaining arguments to a script's own argparse main()"""
+    module = __import__(module_name)
+    sys.argv = [f'{module_name}.py'] + argv
+    return module.main()
+
+def cmd_process(args):
+    from process_county_data import main
+    main(args.county, args.owners, args.vacant, args.out_dir, args.memory_budget)
+
+def cmd_import(args):
+    from config import get_client
+    from import_to_supabase import load_properties, batch_insert_properties
+
+    properties = load_properties(args.snapshot)
+    supabase = get_client(service_role=not args.anon)
+    start = time.time()
+    inserted, failed = batch_insert_properties(supabase, properties, args.batch_size)
+    print(f"\n⏱️  Total time: {time.time() - start:.1f} seconds")
+    return 1 if failed else 0
+
+def cmd_monthly_update(args):
+    from monthly_update import main
+    return main([args.county_csv])
+
+def cmd_diff(args):
+    return run_module_main('snapshot_diff', args.passthrough)
+
+def cmd_bench(args):
+    return run_module_main('property_query_service', ['bench'] + args.passthrough)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='legacy-compass', description='Legacy Compass data tools')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    p = commands.add_parser('process', help='build the master dataset from county + owner + vacant lists')
+    p.add_argument('--county', default=None, help='county parcels CSV')
+    p.add_argument('--owners', default=None, help='hayward_owners.csv')
+    p.add_argument('--vacant', default=None, help='vacant homes CSV')
+    p.add_argument('--out-dir', default=None, help='where the SQL and JSON exports are written')
+    p.add_argument('--memory-budget', type=int, default=None,
+                   help='max owner/vacant keys held in memory before the join spills to disk')
+    p.set_defaults(func=cmd_process)
+
+    p = commands.add_parser('import', help='upsert the JSON export into master_properties')
+    p.add_argument('--snapshot', default='hayward_properties.json')
+    p.add_argument('--batch-size', type=int, default=100)
+    p.add_argument('--anon', action='store_true', help='use the anon key instead of the service role')
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser('monthly-update', help='apply a new county export and notify agents')
+    p.add_argument('county_csv')
+    p.set_defaults(func=cmd_monthly_update)
+
+    # These two keep their own options - everything after the command is passed through
+    p = commands.add_parser('diff', help='offline diff of two county snapshots (snapshot_diff.py)',
+                            add_help=False)
+    p.set_defaults(func=cmd_diff, passthrough=True)
+
+    p = commands.add_parser('bench', help='latency benchmark of the property query service',
+                            add_help=False)
+    p.set_defaults(func=cmd_bench, passthrough=True)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if getattr(args, 'passthrough', False):
+        args.passthrough = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args.func(args) or 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Local Replica of the Legacy Compass database
+Keeps a SQLite copy of master_properties, farm_properties, property_enrichments
+and property_alerts so monthly comparisons and reports run locally instead of paging the API.
+
+Sync is incremental: each table remembers the highest updated_at (created_at
+for the append-only alerts table) it has seen and re-reads from a few minutes
+before it, so rows stamped inside a transaction that committed after the last
+sync are still picked up. The schema's update_*_updated_at triggers keep that
+column current.
+Deleted rows are not visible to a watermark, so farm_properties (small, and the
+source of agent notifications) is fully refreshed on every sync; run with
+--full to rebuild the rest.
+
+Usage:
+  python local_replica.py sync [--full]
+  python local_replica.py report
+  python local_replica.py sql "SELECT zip_code, COUNT(*) FROM master_properties GROUP BY 1"
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+REPLICA_PATH = 'legacy_compass_replica.db'
+SYNC_PAGE_SIZE = 1000
+# Re-read this far behind the watermark: updated_at is NOW() at transaction
+# start, so a long transaction can commit rows older than the last sync saw
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# table: primary key, watermark column, replicated columns
+# 'full_refresh' tables are re-pulled whole every sync so deletes are seen
+TABLES = {
+    'master_properties': {
+        'key': 'apn',
+        'watermark': 'updated_at',
+        'columns': [
+            'apn', 'property_address', 'city', 'state', 'zip_code',
+            'owner_name', 'owner_mailing_address', 'is_absentee',
+            'land_value', 'improvement_value', 'total_value', 'year_built',
+            'bedrooms', 'bathrooms', 'square_feet', 'lot_size', 'property_type',
+            'latitude', 'longitude', 'is_vacant', 'is_verified',
+            'data_source', 'last_sale_date', 'created_at', 'updated_at'
+        ],
+        'indexes': ['owner_name', 'property_address', 'zip_code', 'updated_at']
+    },
+    'farm_properties': {
+        'key': 'id',
+        'watermark': 'updated_at',
+        'columns': [
+            'id', 'farm_id', 'apn', 'user_id', 'is_hot_list', 'priority',
+            'status', 'private_notes', 'last_visited', 'visit_count',
+            'response_type', 'added_at', 'updated_at'
+        ],
+        'indexes': ['apn', 'user_id', 'farm_id', 'updated_at'],
+        # Removed parcels and deleted farms (ON DELETE CASCADE) must drop out,
+        # or notifications go to stale farms and break the farm_id foreign key
+        'full_refresh': True
+    },
+    'property_enrichments': {
+        'key': 'id',
+        'watermark': 'updated_at',
+        'columns': [
+            'id', 'apn', 'user_id', 'phone_numbers', 'email_addresses', 'notes',
+            'tags', 'last_contact_date', 'contact_attempts', 'created_at', 'updated_at'
+        ],
+        'indexes': ['apn', 'updated_at']
+    },
+    'property_alerts': {
+        'key': 'id',
+        'watermark': 'created_at',
+        'columns': ['id', 'apn', 'alert_type', 'details', 'created_at'],
+        'indexes': ['apn', 'alert_type', 'created_at']
+    }
+}
+
+def overlap_start(watermark):
+    """Watermark moved back by SYNC_OVERLAP, in the same ISO format"""
+    if not watermark:
+        return None
+    try:
+        return (datetime.fromisoformat(watermark.replace('Z', '+00:00')) - SYNC_OVERLAP).isoformat()
+    except ValueError:
+        return watermark
+
+class LocalReplica:
+    """SQLite copy of the remote tables plus per-table sync watermarks"""
+
+    def __init__(self, path=REPLICA_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        for table, spec in TABLES.items():
+            cols = ', '.join(f"{c} PRIMARY KEY" if c == spec['key'] else c for c in spec['columns'])
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS {table} ({cols})")
+            for col in spec['indexes']:
+                self.db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{col} ON {table}({col})")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                table_name TEXT PRIMARY KEY,
+                watermark TEXT,
+                last_sync TEXT,
+                rows_synced INTEGER
+            )""")
+        self.db.commit()
+
+    def watermark(self, table):
+        row = self.db.execute("SELECT watermark FROM sync_state WHERE table_name = ?", (table,)).fetchone()
+        return row['watermark'] if row else None
+
+    def _upsert(self, table, rows):
+        """Write a page of API rows; lists/dicts are stored as JSON text"""
+        columns = TABLES[table]['columns']
+        values = []
+        for row in rows:
+            values.append([
+                json.dumps(row.get(c)) if isinstance(row.get(c), (list, dict)) else row.get(c)
+                for c in columns
+            ])
+        placeholders = ', '.join('?' for _ in columns)
+        self.db.executemany(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values)
+
+    def sync_table(self, supabase, table, full=False):
+        """
+        Pull rows changed since the stored watermark (less SYNC_OVERLAP), oldest first
+        Re-fetched rows are simply replaced. The local table only changes when
+        the whole pull succeeds.
+        """
+        spec = TABLES[table]
+        mark_col = spec['watermark']
+        full = full or spec.get('full_refresh', False)
+        watermark = None if full else self.watermark(table)
+        since = overlap_start(watermark)
+
+        synced = 0
+        offset = 0
+        newest = watermark
+        try:
+            if full:
+                self.db.execute(f"DELETE FROM {table}")
+            while True:
+                query = supabase.table(table).select('*')
+                if since:
+                    query = query.gte(mark_col, since)
+                page = query.order(mark_col).order(spec['key']).range(
+                    offset, offset + SYNC_PAGE_SIZE - 1).execute()
+                rows = page.data or []
+                if rows:
+                    self._upsert(table, rows)
+                    synced += len(rows)
+                    newest = max([newest or ''] + [r[mark_col] for r in rows if r.get(mark_col)]) or None
+                if len(rows) < SYNC_PAGE_SIZE:
+                    break
+                offset += SYNC_PAGE_SIZE
+
+            self.db.execute(
+                "INSERT OR REPLACE INTO sync_state (table_name, watermark, last_sync, rows_synced) VALUES (?, ?, ?, ?)",
+                (table, newest, datetime.now().isoformat(), synced))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return synced
+
+    def sync(self, supabase, full=False):
+        """Sync every replicated table, returns rows pulled per table"""
+        return {table: self.sync_table(supabase, table, full) for table in TABLES}
+
+    def query(self, sql, params=()):
+        return [dict(r) for r in self.db.execute(sql, params).fetchall()]
+
+    def get_property(self, apn):
+        row = self.db.execute("SELECT * FROM master_properties WHERE apn = ?", (apn,)).fetchone()
+        return dict(row) if row else None
+
+    def farm_matches(self, apns):
+        """farm_properties rows for a set of APNs - local version of the notify lookup"""
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_apns (apn TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM lookup_apns")
+        self.db.executemany("INSERT OR IGNORE INTO lookup_apns VALUES (?)", [(a,) for a in apns])
+        return self.query("""
+            SELECT fp.farm_id, fp.user_id, fp.apn
+            FROM farm_properties fp JOIN lookup_apns USING (apn)""")
+
+    def close(self):
+        self.db.close()
+
+def print_report(replica):
+    """Read-only summary that used to take several API round trips"""
+    summary = replica.query("""
+        SELECT COUNT(*) AS total,
+               SUM(is_vacant) AS vacant,
+               SUM(is_absentee) AS absentee,
+               SUM(owner_name IS NOT NULL) AS with_owner,
+               ROUND(AVG(total_value)) AS avg_value
+        FROM master_properties""")[0]
+    print("\n📊 MASTER PROPERTIES")
+    print(f"  Total: {summary['total'] or 0:,}")
+    print(f"  With owner data: {summary['with_owner'] or 0:,}")
+    print(f"  Vacant: {summary['vacant'] or 0:,}")
+    print(f"  Absentee: {summary['absentee'] or 0:,}")
+    print(f"  Average value: ${summary['avg_value'] or 0:,.0f}")
+
+    print("\n🏘️  BY ZIP")
+    for row in replica.query("""
+            SELECT zip_code, COUNT(*) AS n, SUM(is_vacant) AS vacant, SUM(is_absentee) AS absentee
+            FROM master_properties GROUP BY zip_code ORDER BY n DESC LIMIT 10"""):
+        print(f"  {row['zip_code'] or 'unknown'}: {row['n']:,} ({row['vacant'] or 0} vacant, {row['absentee'] or 0} absentee)")
+
+    print("\n🔥 ALERTS (last 30 days)")
+    for row in replica.query("""
+            SELECT alert_type, COUNT(*) AS n FROM property_alerts
+            WHERE created_at >= date('now', '-30 days') GROUP BY alert_type ORDER BY n DESC"""):
+        print(f"  {row['alert_type']}: {row['n']:,}")
+
+    print("\n📍 FARMS")
+    farms = replica.query("""
+        SELECT COUNT(DISTINCT farm_id) AS farms, COUNT(DISTINCT user_id) AS agents, COUNT(*) AS properties
+        FROM farm_properties""")[0]
+    print(f"  {farms['farms']:,} farms, {farms['agents']:,} agents, {farms['properties']:,} farmed properties")
+
+def main():
+    parser = argparse.ArgumentParser(description='Local SQLite replica of the Legacy Compass tables')
+    parser.add_argument('mode', choices=['sync', 'report', 'sql'])
+    parser.add_argument('sql', nargs='?', default='')
+    parser.add_argument('--db', default=REPLICA_PATH)
+    parser.add_argument('--full', action='store_true', help='drop local rows and re-pull everything')
+    args = parser.parse_args()
+
+    replica = LocalReplica(args.db)
+
+    if args.mode == 'sync':
+        from config import get_client
+
+        print("🔄 Syncing local replica...")
+        start = time.perf_counter()
+        counts = replica.sync(get_client(), args.full)
+        for table, count in counts.items():
+            print(f"  {table}: {count:,} rows (watermark {replica.watermark(table)})")
+        print(f"✅ Synced in {time.perf_counter() - start:.1f}s → {args.db}")
+
+    elif args.mode == 'report':
+        start = time.perf_counter()
+        print_report(replica)
+        print(f"\n⏱️  {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    else:
+        for row in replica.query(args.sql):
+            print(row)
+
+    replica.close()
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,8 @@
 -- This creates the authoritative properties table with APNs as primary keys
 
 -- Drop existing tables if they exist (for clean setup)
+DROP TABLE IF EXISTS agent_notifications CASCADE;
+DROP TABLE IF EXISTS property_alerts CASCADE;
 DROP TABLE IF EXISTS farm_properties CASCADE;
 DROP TABLE IF EXISTS user_farms CASCADE;
 DROP TABLE IF EXISTS property_enrichments CASCADE;
@@ -113,6 +115,36 @@ CREATE TABLE farm_properties (
     UNIQUE(farm_id, apn)
 );
 
+-- Property Alerts (Append-only log of county changes written by monthly_update.py)
+CREATE TABLE property_alerts (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    apn TEXT NOT NULL REFERENCES master_properties(apn) ON DELETE CASCADE,
+    alert_type TEXT NOT NULL, -- 'title_transfer', 'value_change', 'vacant_change'
+    details TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Agent Notifications (Queue of per-farm digests written by monthly_update.py)
+CREATE TABLE agent_notifications (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    farm_id UUID NOT NULL REFERENCES user_farms(id) ON DELETE CASCADE,
+    
+    -- Digest contents
+    notification_type TEXT NOT NULL DEFAULT 'title_transfer',
+    apns TEXT[] NOT NULL,
+    property_count INTEGER DEFAULT 0,
+    summary TEXT,
+    details JSONB,
+    
+    -- Delivery tracking
+    status TEXT DEFAULT 'pending', -- 'pending', 'sent', 'read'
+    sent_at TIMESTAMPTZ,
+    
+    -- Metadata
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- Indexes for performance
 CREATE INDEX idx_master_properties_address ON master_properties(property_address);
 CREATE INDEX idx_master_properties_owner ON master_properties(owner_name);
@@ -122,6 +154,12 @@ CREATE INDEX idx_property_enrichments_apn ON property_enrichments(apn);
 CREATE INDEX idx_farm_properties_farm ON farm_properties(farm_id);
 CREATE INDEX idx_farm_properties_user ON farm_properties(user_id);
 CREATE INDEX idx_farm_properties_hot ON farm_properties(is_hot_list);
+CREATE INDEX idx_farm_properties_apn ON farm_properties(apn);
+CREATE INDEX idx_master_properties_updated ON master_properties(updated_at);
+CREATE INDEX idx_farm_properties_updated ON farm_properties(updated_at);
+CREATE INDEX idx_property_alerts_apn ON property_alerts(apn);
+CREATE INDEX idx_property_alerts_created ON property_alerts(created_at);
+CREATE INDEX idx_agent_notifications_user ON agent_notifications(user_id, status);
 
 -- Row Level Security Policies
 
@@ -130,6 +168,8 @@ ALTER TABLE master_properties ENABLE ROW LEVEL SECURITY;
 ALTER TABLE property_enrichments ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_farms ENABLE ROW LEVEL SECURITY;
 ALTER TABLE farm_properties ENABLE ROW LEVEL SECURITY;
+ALTER TABLE property_alerts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE agent_notifications ENABLE ROW LEVEL SECURITY;
 
 -- Master Properties: Everyone can read
 CREATE POLICY "Master properties are public read" 
@@ -205,6 +245,23 @@ ON farm_properties FOR DELETE
 TO authenticated 
 USING (auth.uid() = user_id);
 
+-- Property Alerts: Everyone can read (writes come from the service role)
+CREATE POLICY "Property alerts are public read" 
+ON property_alerts FOR SELECT 
+TO authenticated 
+USING (true);
+
+-- Agent Notifications: Users can read and mark their own digests
+CREATE POLICY "Users can view their notifications" 
+ON agent_notifications FOR SELECT 
+TO authenticated 
+USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can update their notifications" 
+ON agent_notifications FOR UPDATE 
+TO authenticated 
+USING (auth.uid() = user_id);
+
 -- Admin (Les) can see everything
 CREATE POLICY "Admin can view all farms" 
 ON user_farms FOR SELECT 
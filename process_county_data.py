@@ -6,9 +6,13 @@ Creates a master database of Hayward properties with APNs
 
 import csv
 import json
+import math
+import os
 import re
 from datetime import datetime
 
+import config
+
 def normalize_address(addr):
     """Normalize address for matching"""
     if not addr:
@@ -42,116 +46,281 @@ def normalize_name(name):
     # Remove extra spaces
     return ' '.join(name.split())
 
-def parse_county_csv():
-    """Parse Alameda County CSV and filter for Hayward properties"""
+# Alameda APNs are book-page-parcel-sub, e.g. 078C-0434-019-00. Vendor lists
+# drop the separators ('078c043401900') or the padding ('452-84-78').
+APN_BOOK_RE = re.compile(r'^(\d{1,3})([A-Z]?)$')
+APN_COMPACT_RE = re.compile(r'^(\d{3}[A-Z]?)(\d{4})(\d{3}[A-Z]?)(\d{2})?$')
+
+def normalize_apn(apn):
+    """Canonical APN (078C-0434-019-00) for matching across formats"""
+    if not apn:
+        return ""
+    parts = [p for p in re.split(r'[^0-9A-Z]+', str(apn).upper()) if p]
+    if len(parts) not in (3, 4):
+        # '078c043401900', or with a blank for the book letter: '083 046100100'
+        match = APN_COMPACT_RE.match(''.join(parts))
+        if not match:
+            return ''.join(parts)
+        parts = [p for p in match.groups() if p]
+    book = APN_BOOK_RE.match(parts[0])
+    if not book or not parts[1].isdigit() or not parts[2][:1].isdigit() or \
+            (len(parts) == 4 and not parts[3].isdigit()):
+        return ''.join(parts)
+    parcel = re.match(r'^(\d+)([A-Z]?)$', parts[2])
+    if not parcel:
+        return ''.join(parts)
+    sub = int(parts[3]) if len(parts) == 4 else 0
+    return (f"{int(book.group(1)):03d}{book.group(2)}-{int(parts[1]):04d}-"
+            f"{int(parcel.group(1)):03d}{parcel.group(2)}-{sub:02d}")
+
+# Alameda County bounding box - centroids outside it are bad data, not Hayward parcels
+COUNTY_BOUNDS = {
+    'latitude': (37.45, 37.91),
+    'longitude': (-122.38, -121.46)
+}
+
+# field: (county column, value when blank, (min, max), on a bad value)
+# 'null' keeps the parcel and stores NULL - a parcel without a usable centroid
+# is still a parcel; 'reject' quarantines the whole row
+NUMERIC_COLUMNS = {
+    'latitude': ('CENTROID_Y', None, COUNTY_BOUNDS['latitude'], 'null'),
+    'longitude': ('CENTROID_X', None, COUNTY_BOUNDS['longitude'], 'null'),
+    'land_value': ('Land', 0.0, (0, None), 'reject'),
+    'improvement_value': ('Imps', 0.0, (0, None), 'reject')
+}
+
+CONVERT_BATCH_SIZE = 5000
+TRUE_VALUES = {'true', 't', 'yes', 'y', '1'}
+FALSE_VALUES = {'false', 'f', 'no', 'n', '0', ''}
+
+def convert_numeric_column(values, blank=None, bounds=(None, None)):
+    """
+    Convert one column of strings to floats in bulk
+    Returns (converted, errors) where errors maps row index -> reason
+    Clean batches take the fast path; only a failing batch is re-parsed value by value
+    """
+    try:
+        converted = [float(v) if v else blank for v in values]
+    except ValueError:
+        converted = []
+        errors = {}
+        for i, v in enumerate(values):
+            try:
+                converted.append(float(v) if v else blank)
+            except ValueError:
+                converted.append(None)
+                errors[i] = f"not a number: {v!r}"
+    else:
+        errors = {}
+
+    lo, hi = bounds
+    for i, x in enumerate(converted):
+        if i in errors:
+            continue
+        if x is None:
+            errors[i] = "missing"
+        elif not math.isfinite(x) or (lo is not None and x < lo) or (hi is not None and x > hi):
+            errors[i] = f"out of range: {x}"
+    return converted, errors
+
+def convert_boolean_column(values):
+    """
+    Convert one column of 'true'/'false'-style strings in bulk
+    Returns (converted, errors); unrecognized values convert to False
+    """
+    lowered = [str(v).strip().lower() for v in values]
+    converted = [v in TRUE_VALUES for v in lowered]
+    errors = {i: f"not a boolean: {values[i]!r}" for i, v in enumerate(lowered)
+              if v not in TRUE_VALUES and v not in FALSE_VALUES}
+    return converted, errors
+
+def new_quality_report():
+    """Data-quality counters shared by the loaders"""
+    return {'rows_read': 0, 'rows_clean': 0, 'rows_quarantined': 0, 'values_nulled': 0, 'column_errors': {}}
+
+def convert_county_batch(rows, quality, quarantine):
+    """
+    Run every numeric converter over a batch of county rows
+    Rows come back as (row, values). A bad value in a 'null' column is set to
+    None and the row is kept; a bad value in a 'reject' column quarantines the
+    row. Both are logged to the quarantine writer with the action taken.
+    """
+    converted = {}
+    reasons = {}
+    nulled = {}
+    for field, (column, blank, bounds, on_error) in NUMERIC_COLUMNS.items():
+        values = [(row.get(column) or '').strip() for row in rows]
+        converted[field], errors = convert_numeric_column(values, blank, bounds)
+        if errors:
+            quality['column_errors'][column] = quality['column_errors'].get(column, 0) + len(errors)
+            for i, reason in errors.items():
+                if on_error == 'null':
+                    converted[field][i] = None
+                    nulled.setdefault(i, []).append(f"{column} {reason}")
+                else:
+                    reasons.setdefault(i, []).append(f"{column} {reason}")
+
+    clean = []
+    for i, row in enumerate(rows):
+        if i in reasons:
+            quality['rows_quarantined'] += 1
+            if quarantine:
+                quarantine.writerow({**row, 'quarantine_action': 'rejected',
+                                     'quarantine_reason': '; '.join(reasons[i] + nulled.get(i, []))})
+            continue
+        if i in nulled:
+            quality['values_nulled'] += len(nulled[i])
+            if quarantine:
+                quarantine.writerow({**row, 'quarantine_action': 'nulled',
+                                     'quarantine_reason': '; '.join(nulled[i])})
+        clean.append((row, {field: converted[field][i] for field in NUMERIC_COLUMNS}))
+    quality['rows_clean'] += len(clean)
+    return clean
+
+def parse_county_csv(county_file=None, quarantine_file='county_quarantine.csv'):
+    """
+    Parse Alameda County CSV and filter for Hayward properties
+    Rows that fail type or range checks are written to quarantine_file with reasons;
+    rows kept with a nulled centroid are logged there too
+    Returns (properties by APN, data-quality report)
+    """
     print("Loading Alameda County parcels...")
     hayward_properties = {}
+    quality = new_quality_report()
     
-    county_file = '/Users/kiron/Downloads/Parcels_6078659232109355209.csv'
+    county_file = county_file or config.COUNTY_CSV
     
-    with open(county_file, 'r', encoding='utf-8-sig') as f:
+    with open(county_file, 'r', encoding='utf-8-sig') as f, \
+         open(quarantine_file, 'w', newline='', encoding='utf-8') as qf:
         reader = csv.DictReader(f)
+        quarantine = csv.DictWriter(qf, fieldnames=list(reader.fieldnames or []) + ['quarantine_action', 'quarantine_reason'],
+                                    extrasaction='ignore')
+        quarantine.writeheader()
+        
+        def flush(batch):
+            for row, values in convert_county_batch(batch, quality, quarantine):
+                apn = row.get('APN', '').strip()
+                
+                # Build street address from components
+                street_num = row.get('SitusStreetNumber', '').strip()
+                street_name = row.get('SitusStreetName', '').strip()
+                street_unit = row.get('SitusUnit', '').strip()
+                
+                # Construct full street address
+                street_address = f"{street_num} {street_name}".strip()
+                if street_unit:
+                    street_address += f" {street_unit}"
+                
+                # Get mailing address for owner info
+                mailing_address = row.get('MailingAddress', '')
+                
+                hayward_properties[apn] = {
+                    'apn': apn,
+                    'property_address': normalize_address(street_address),
+                    'property_address_raw': street_address,
+                    'city': 'Hayward',
+                    'state': 'CA',
+                    'zip_code': row.get('SitusZip', ''),
+                    'latitude': values['latitude'],
+                    'longitude': values['longitude'],
+                    'land_value': values['land_value'],
+                    'improvement_value': values['improvement_value'],
+                    'total_value': values['land_value'] + values['improvement_value'],
+                    'data_source': 'county',
+                    'owner_name': None,
+                    'owner_mailing_address': mailing_address,
+                    'is_absentee': False,
+                    'is_vacant': False
+                }
+        
+        batch = []
         for row in reader:
             # Check if it's in Hayward based on SitusCity column
             situs_city = row.get('SitusCity', '').upper()
-            if 'HAYWARD' in situs_city:
-                apn = row.get('APN', '').strip()
-                if apn:
-                    # Build street address from components
-                    street_num = row.get('SitusStreetNumber', '').strip()
-                    street_name = row.get('SitusStreetName', '').strip()
-                    street_unit = row.get('SitusUnit', '').strip()
-                    
-                    # Construct full street address
-                    street_address = f"{street_num} {street_name}".strip()
-                    if street_unit:
-                        street_address += f" {street_unit}"
-                    
-                    # Get coordinates
-                    try:
-                        lat = float(row.get('CENTROID_Y', 0))
-                        lon = float(row.get('CENTROID_X', 0))
-                    except:
-                        lat, lon = 0, 0
-                    
-                    # Get property values
-                    try:
-                        land_value = float(row.get('Land', 0) or 0)
-                        improvement_value = float(row.get('Imps', 0) or 0)
-                        total_value = land_value + improvement_value
-                    except:
-                        land_value = improvement_value = total_value = 0
-                    
-                    # Get mailing address for owner info
-                    mailing_address = row.get('MailingAddress', '')
-                    
-                    hayward_properties[apn] = {
-                        'apn': apn,
-                        'property_address': normalize_address(street_address),
-                        'property_address_raw': street_address,
-                        'city': 'Hayward',
-                        'state': 'CA',
-                        'zip_code': row.get('SitusZip', ''),
-                        'latitude': lat,
-                        'longitude': lon,
-                        'land_value': land_value,
-                        'improvement_value': improvement_value,
-                        'total_value': total_value,
-                        'data_source': 'county',
-                        'owner_name': None,
-                        'owner_mailing_address': mailing_address,
-                        'is_absentee': False,
-                        'is_vacant': False
-                    }
+            if 'HAYWARD' in situs_city and row.get('APN', '').strip():
+                quality['rows_read'] += 1
+                batch.append(row)
+                if len(batch) >= CONVERT_BATCH_SIZE:
+                    flush(batch)
+                    batch = []
+        if batch:
+            flush(batch)
     
     print(f"Found {len(hayward_properties)} Hayward properties with APNs")
-    return hayward_properties
+    if quality['rows_quarantined']:
+        print(f"⚠️  Quarantined {quality['rows_quarantined']} rows → {quarantine_file}")
+    return hayward_properties, quality
 
-def load_hayward_owners():
+def print_quality_report(quality):
+    """Data-quality section of the run summary"""
+    print("\n=== DATA QUALITY ===")
+    print(f"Rows read: {quality['rows_read']}")
+    print(f"Clean rows: {quality['rows_clean']}")
+    print(f"Quarantined rows: {quality['rows_quarantined']}")
+    print(f"Values nulled (row kept): {quality['values_nulled']}")
+    for column, count in sorted(quality['column_errors'].items()):
+        print(f"  {column}: {count} bad values")
+
+def iter_owner_rows(owners_file, bad_flags=None):
+    """
+    Stream (normalized address, owner data) from hayward_owners.csv
+    Flags are converted a batch at a time; unrecognized ones are counted in bad_flags
+    """
+    with open(owners_file, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        while True:
+            rows = [row for _, row in zip(range(CONVERT_BATCH_SIZE), reader)]
+            if not rows:
+                return
+            absentee, errors = convert_boolean_column([row.get('is_absentee', '') for row in rows])
+            if bad_flags is not None:
+                bad_flags.extend(errors)
+            for row, is_absentee in zip(rows, absentee):
+                addr = normalize_address(row['property_address'])
+                if addr:
+                    yield addr, {
+                        'owner_name': row['owner_name'],
+                        'owner_mailing_address': row['owner_mailing_address'],
+                        'is_absentee': is_absentee
+                    }
+
+def load_hayward_owners(owners_file=None):
     """Load the 68k hayward_owners.csv file"""
     print("\nLoading hayward_owners.csv...")
-    owners_by_address = {}
+    owners_file = owners_file or config.OWNERS_CSV
     
-    owners_file = '/Users/kiron/Desktop/legacy compass/legacy-compass-complete-working 4/data/hayward_owners.csv'
-    
-    with open(owners_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            addr = normalize_address(row['property_address'])
-            if addr:
-                owners_by_address[addr] = {
-                    'owner_name': row['owner_name'],
-                    'owner_mailing_address': row['owner_mailing_address'],
-                    'is_absentee': row.get('is_absentee', '').lower() == 'true'
-                }
+    bad_flags = []
+    owners_by_address = dict(iter_owner_rows(owners_file, bad_flags))
     
     print(f"Loaded {len(owners_by_address)} properties from hayward_owners.csv")
+    if bad_flags:
+        print(f"⚠️  {len(bad_flags)} rows had an unrecognized is_absentee value (treated as false)")
     return owners_by_address
 
-def load_jeff_vacant():
+def iter_vacant_rows(jeff_file):
+    """Stream (apn, normalized address) from Jeff's vacant list, either may be blank"""
+    with open(jeff_file, 'r', encoding='utf-8') as f:
+        # Skip header rows
+        for line_num, line in enumerate(f):
+            if line_num < 2 or 'Hayward,CA' not in line:
+                continue
+            parts = line.strip().split(',')
+            if len(parts) > 5:
+                yield parts[0].strip(), normalize_address(parts[4].strip())
+
+def load_jeff_vacant(jeff_file=None):
     """Load Jeff's vacant properties list"""
     print("\nLoading Jeff's vacant properties...")
     vacant_apns = set()
     vacant_by_address = {}
     
-    jeff_file = '/Users/kiron/Desktop/legacy compass/legacy-compass-complete-working 4/jeff list vacant homes csv file.csv'
+    jeff_file = jeff_file or config.VACANT_CSV
     
-    with open(jeff_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        # Skip header rows
-        for line in lines[2:]:
-            if 'Hayward,CA' in line:
-                parts = line.strip().split(',')
-                if len(parts) > 5:
-                    apn = parts[0].strip()
-                    street_addr = parts[4].strip()
-                    
-                    if apn:
-                        vacant_apns.add(apn)
-                    
-                    addr = normalize_address(street_addr)
-                    if addr:
-                        vacant_by_address[addr] = True
+    for apn, addr in iter_vacant_rows(jeff_file):
+        if apn:
+            vacant_apns.add(apn)
+        if addr:
+            vacant_by_address[addr] = True
     
     print(f"Found {len(vacant_apns)} vacant properties with APNs")
     print(f"Found {len(vacant_by_address)} vacant properties by address")
@@ -163,6 +332,8 @@ def merge_data(county_properties, owners_by_address, vacant_apns, vacant_by_addr
     
     matched_owners = 0
     matched_vacant = 0
+    # The vacant list's APNs are unpadded ('452-84-78'), compare canonical forms
+    vacant_keys = {normalize_apn(a) for a in vacant_apns}
     
     # Match owner data by address
     for apn, prop in county_properties.items():
@@ -177,7 +348,7 @@ def merge_data(county_properties, owners_by_address, vacant_apns, vacant_by_addr
             matched_owners += 1
         
         # Check if vacant by APN
-        if apn in vacant_apns:
+        if normalize_apn(apn) in vacant_keys:
             prop['is_vacant'] = True
             matched_vacant += 1
         # Check if vacant by address
@@ -269,33 +440,44 @@ def generate_json_export(properties, output_file='hayward_properties.json'):
     
     print(f"JSON file generated with {len(props_list)} properties")
 
-def main():
+def main(county_file=None, owners_file=None, vacant_file=None, out_dir=None, memory_budget=None):
     print("=== LEGACY COMPASS DATA PROCESSOR ===")
     print("Processing county data and creating master database...")
     
     # Step 1: Load county parcels
-    county_properties = parse_county_csv()
+    county_properties, quality = parse_county_csv(county_file)
     
-    # Step 2: Load owner data
-    owners_by_address = load_hayward_owners()
-    
-    # Step 3: Load vacant properties
-    vacant_apns, vacant_by_address = load_jeff_vacant()
-    
-    # Step 4: Merge all data
-    master_properties = merge_data(
-        county_properties, 
-        owners_by_address, 
-        vacant_apns, 
-        vacant_by_address
-    )
+    if memory_budget:
+        # Steps 2-4 for owner/vacant lists too big for memory
+        from spill_join import merge_with_budget
+        master_properties = merge_with_budget(
+            county_properties,
+            owners_file or config.OWNERS_CSV,
+            vacant_file or config.VACANT_CSV,
+            memory_budget
+        )
+    else:
+        # Step 2: Load owner data
+        owners_by_address = load_hayward_owners(owners_file)
+        
+        # Step 3: Load vacant properties
+        vacant_apns, vacant_by_address = load_jeff_vacant(vacant_file)
+        
+        # Step 4: Merge all data
+        master_properties = merge_data(
+            county_properties, 
+            owners_by_address, 
+            vacant_apns, 
+            vacant_by_address
+        )
     
     # Step 5: Generate SQL import file
-    sql_file = '/Users/kiron/Desktop/legacy compass/legacy-compass-complete-working 4/import_properties.sql'
+    out_dir = out_dir or config.DATA_DIR
+    sql_file = os.path.join(out_dir, 'import_properties.sql')
     generate_sql_inserts(master_properties, sql_file)
     
     # Step 6: Generate JSON backup
-    json_file = '/Users/kiron/Desktop/legacy compass/legacy-compass-complete-working 4/hayward_properties.json'
+    json_file = os.path.join(out_dir, 'hayward_properties.json')
     generate_json_export(master_properties, json_file)
     
     print("\n=== SUMMARY ===")
@@ -303,6 +485,7 @@ def main():
     print(f"Properties with owner data: {sum(1 for p in master_properties.values() if p['owner_name'])}")
     print(f"Vacant properties: {sum(1 for p in master_properties.values() if p['is_vacant'])}")
     print(f"Absentee owners: {sum(1 for p in master_properties.values() if p['is_absentee'])}")
+    print_quality_report(quality)
     print(f"\nSQL import file: {sql_file}")
     print(f"JSON backup file: {json_file}")
     print("\nNext steps:")
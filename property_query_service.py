@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Local Property Query Service for Legacy Compass
+Loads the processed snapshot (hayward_properties.json) once and answers
+searches from in-memory indexes instead of downloading the whole CSV or
+round-tripping to Supabase.
+
+Endpoints:
+  GET /properties/<apn>
+  GET /autocomplete?q=2924%20DIX&limit=10
+  GET /search?bbox=minLon,minLat,maxLon,maxLat&owner=SMITH&vacant=true&absentee=true&limit=50&offset=0
+  GET /health
+
+Usage:
+  python property_query_service.py serve [--snapshot hayward_properties.json] [--port 8765]
+  python property_query_service.py bench [--snapshot hayward_properties.json] [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from address_index import AddressIndex
+from process_county_data import normalize_name
+
+GRID_CELL = 0.005      # degrees, roughly 500m cells for bbox lookups
+CACHE_SIZE = 1024      # cached search results (full id lists, before paging)
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+class PropertyIndex:
+    """In-memory indexes over one processed snapshot"""
+
+    def __init__(self, properties):
+        self.properties = properties
+        self.by_apn = {}
+        self.grid = {}
+        self.owner_tokens = {}
+        self.vacant = set()
+        self.absentee = set()
+
+        for i, prop in enumerate(properties):
+            self.by_apn[prop['apn']] = i
+
+            lat, lon = prop.get('latitude'), prop.get('longitude')
+            if lat and lon:
+                self.grid.setdefault(self._cell(lat, lon), []).append(i)
+
+            for token in set(normalize_name(prop.get('owner_name')).split()):
+                self.owner_tokens.setdefault(token, set()).add(i)
+
+            if prop.get('is_vacant'):
+                self.vacant.add(i)
+            if prop.get('is_absentee'):
+                self.absentee.add(i)
+
+        self.autocomplete = AddressIndex.build(properties)
+
+        cells = list(self.grid) or [(0, 0)]
+        self.grid_bounds = (min(c[0] for c in cells), min(c[1] for c in cells),
+                            max(c[0] for c in cells), max(c[1] for c in cells))
+
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+
+    @staticmethod
+    def _cell(lat, lon):
+        return (int(lat // GRID_CELL), int(lon // GRID_CELL))
+
+    def _bbox_ids(self, min_lon, min_lat, max_lon, max_lat):
+        """Candidate ids from grid cells, then exact coordinate check"""
+        lat0, lon0 = self._cell(min_lat, min_lon)
+        lat1, lon1 = self._cell(max_lat, max_lon)
+        # Clamp to the populated grid so huge viewports don't walk empty cells
+        lat0, lon0 = max(lat0, self.grid_bounds[0]), max(lon0, self.grid_bounds[1])
+        lat1, lon1 = min(lat1, self.grid_bounds[2]), min(lon1, self.grid_bounds[3])
+        ids = set()
+        for cell_lat in range(lat0, lat1 + 1):
+            for cell_lon in range(lon0, lon1 + 1):
+                cell = self.grid.get((cell_lat, cell_lon))
+                if not cell:
+                    continue
+                # Interior cells are entirely inside the box - no per-point check
+                if lat0 < cell_lat < lat1 and lon0 < cell_lon < lon1:
+                    ids.update(cell)
+                    continue
+                for i in cell:
+                    prop = self.properties[i]
+                    if min_lat <= prop['latitude'] <= max_lat and min_lon <= prop['longitude'] <= max_lon:
+                        ids.add(i)
+        return ids
+
+    def _owner_ids(self, owner):
+        """
+        Ids whose owner name contains every token of the query
+        A query that normalizes to nothing (only stop words like TRUST) matches nothing
+        """
+        tokens = normalize_name(owner).split()
+        if not tokens:
+            return set()
+        postings = sorted((self.owner_tokens.get(t, set()) for t in tokens), key=len)
+        return set.intersection(*postings)
+
+    def search(self, bbox=None, owner=None, vacant=None, absentee=None):
+        """
+        Run a filtered search, smallest candidate set first
+        Returns a sorted list of property ids (cached by query)
+        """
+        key = (bbox, owner, vacant, absentee)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return self.cache[key]
+
+        candidates = []
+        if bbox:
+            candidates.append(self._bbox_ids(*bbox))
+        if owner:
+            candidates.append(self._owner_ids(owner))
+        if vacant:
+            candidates.append(self.vacant)
+        if absentee:
+            candidates.append(self.absentee)
+
+        if candidates:
+            candidates.sort(key=len)
+            ids = set(candidates[0]).intersection(*candidates[1:])
+        else:
+            ids = range(len(self.properties))
+
+        # Explicit false filters exclude flagged properties
+        if vacant is False:
+            ids = (i for i in ids if i not in self.vacant)
+        if absentee is False:
+            ids = (i for i in ids if i not in self.absentee)
+
+        result = sorted(ids)
+        self.cache[key] = result
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return result
+
+def load_snapshot(path):
+    """Load the processed JSON export written by process_county_data.py"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data['properties']
+
+def parse_flag(values):
+    """'true'/'false' query flags; anything else means no filter"""
+    if not values:
+        return None
+    value = values[0].lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    return None
+
+def handle_request(index, target):
+    """Route one GET request, returns (status, payload)"""
+    url = urlsplit(target)
+    params = parse_qs(url.query)
+
+    if url.path == '/health':
+        return 200, {'status': 'ok', 'properties': len(index.properties)}
+
+    if url.path.startswith('/properties/'):
+        apn = unquote(url.path[len('/properties/'):])
+        i = index.by_apn.get(apn)
+        if i is None:
+            return 404, {'error': f'APN {apn} not found'}
+        return 200, index.properties[i]
+
+    if url.path == '/autocomplete':
+        try:
+            limit = max(min(int(params.get('limit', [10])[0]), MAX_LIMIT), 0)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        return 200, {'results': index.autocomplete.lookup(params.get('q', [''])[0], limit)}
+
+    if url.path == '/search':
+        try:
+            bbox = tuple(float(v) for v in params['bbox'][0].split(',')) if 'bbox' in params else None
+            if bbox and len(bbox) != 4:
+                raise ValueError('bbox needs minLon,minLat,maxLon,maxLat')
+            if bbox and not all(math.isfinite(v) for v in bbox):
+                raise ValueError('bbox values must be finite numbers')
+            limit = max(min(int(params.get('limit', [DEFAULT_LIMIT])[0]), MAX_LIMIT), 0)
+            offset = max(int(params.get('offset', [0])[0]), 0)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+        owner = params.get('owner', [None])[0]
+        ids = index.search(bbox, owner.upper() if owner else None,
+                           parse_flag(params.get('vacant')), parse_flag(params.get('absentee')))
+        return 200, {
+            'total': len(ids),
+            'offset': offset,
+            'limit': limit,
+            'results': [index.properties[i] for i in ids[offset:offset + limit]]
+        }
+
+    return 404, {'error': f'Unknown path {url.path}'}
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+async def serve_connection(index, reader, writer):
+    """Minimal HTTP/1.1 loop with keep-alive"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            keep_alive = True
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b'\n', b''):
+                    break
+                if header.lower().startswith(b'connection:') and b'close' in header.lower():
+                    keep_alive = False
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2:
+                break
+            if parts[0] != 'GET':
+                status, payload = 405, {'error': 'Only GET is supported'}
+            else:
+                status, payload = handle_request(index, parts[1])
+
+            body = json.dumps(payload).encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Access-Control-Allow-Origin: *\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionResetError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def start_service(index, host, port):
+    return await asyncio.start_server(lambda r, w: serve_connection(index, r, w), host, port)
+
+def sample_queries(index, count):
+    """Mix of APN lookups, map viewports, owner searches and list filters"""
+    located = [p for p in index.properties if p.get('latitude') and p.get('longitude')]
+    owners = [p['owner_name'] for p in index.properties if p.get('owner_name')]
+    queries = []
+    for _ in range(count):
+        kind = random.random()
+        if kind < 0.3 or not located:
+            queries.append(f"/properties/{random.choice(index.properties)['apn']}")
+        elif kind < 0.6:
+            p = random.choice(located)
+            queries.append(f"/search?bbox={p['longitude']-0.01},{p['latitude']-0.01},"
+                           f"{p['longitude']+0.01},{p['latitude']+0.01}&limit=100")
+        elif kind < 0.8 and owners:
+            token = normalize_name(random.choice(owners)).split()[:1] or ['SMITH']
+            queries.append(f"/search?owner={token[0]}")
+        else:
+            queries.append(f"/search?vacant=true&absentee={random.choice(['true', 'false'])}"
+                           f"&offset={random.choice([0, 50, 100])}")
+    return queries
+
+async def run_benchmark(index, total_requests, concurrency, port):
+    server = await start_service(index, '127.0.0.1', port)
+    queries = sample_queries(index, total_requests)
+    latencies = []
+
+    async def client(batch):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for target in batch:
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - start) * 1000)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(queries[i::concurrency]) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+
+    latencies.sort()
+    pct = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)]
+    print(f"\n📊 {len(latencies):,} requests, {concurrency} connections, {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} req/s)")
+    print(f"   p50: {pct(0.50):.2f} ms")
+    print(f"   p95: {pct(0.95):.2f} ms")
+    print(f"   p99: {pct(0.99):.2f} ms")
+    print(f"   cache hits: {index.cache_hits:,}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Local property query service')
+    parser.add_argument('mode', choices=['serve', 'bench'])
+    parser.add_argument('--snapshot', default='hayward_properties.json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("LEGACY COMPASS - PROPERTY QUERY SERVICE")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    index = PropertyIndex(load_snapshot(args.snapshot))
+    print(f"✅ Indexed {len(index.properties):,} properties in {time.perf_counter() - start:.2f}s")
+
+    if args.mode == 'bench':
+        asyncio.run(run_benchmark(index, args.requests, args.concurrency, args.port))
+        return
+
+    async def serve():
+        server = await start_service(index, args.host, args.port)
+        print(f"🚀 Listening on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+if __name__ == '__main__':
+    main()
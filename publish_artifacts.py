@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Publish PWA Data Artifacts for Legacy Compass
+Run after process_county_data.py. Splits hayward_properties.json by ZIP code,
+precompresses each partition (gzip, and brotli when installed), names every
+file by content hash and writes data/parts/manifest.json.
+
+js/data-loader.js compares manifests and only fetches partitions whose hash
+changed, so a one-row change re-downloads one ZIP instead of the whole
+dataset. The service
+worker requests the .br (else .gz) sibling and _headers serves it with the
+matching Content-Encoding, so the compressed bytes are what goes over the wire.
+
+Usage: python publish_artifacts.py [--snapshot hayward_properties.json] [--out data/parts]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+HASH_LENGTH = 12
+
+# Only names this tool writes are ever pruned from --out
+ARTIFACT_NAME = re.compile(r'^(properties-[^.]+|address-index)\.[0-9a-f]{%d}\.json(\.gz|\.br)?$' % HASH_LENGTH)
+
+def partition_by_zip(properties):
+    """Group properties by ZIP, APN-sorted so identical data hashes identically"""
+    partitions = {}
+    for prop in properties:
+        zip_code = (prop.get('zip_code') or '').strip()[:5] or 'unknown'
+        partitions.setdefault(zip_code, []).append(prop)
+    for props in partitions.values():
+        props.sort(key=lambda p: p['apn'])
+    return partitions
+
+def encode_partition(props):
+    """Canonical compact JSON bytes for one partition"""
+    return json.dumps(props, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def write_artifact(out_dir, stem, raw, ext='json'):
+    """
+    Write raw + precompressed variants under a content-hashed name
+    Returns the manifest entry
+    """
+    digest = hashlib.sha256(raw).hexdigest()
+    filename = f"{stem}.{digest[:HASH_LENGTH]}.{ext}"
+    entry = {'file': filename, 'hash': digest, 'bytes': len(raw)}
+
+    path = os.path.join(out_dir, filename)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(raw)
+
+    # mtime=0 keeps the gzip bytes stable between runs
+    gz = gzip.compress(raw, compresslevel=9, mtime=0)
+    entry['gzip_bytes'] = len(gz)
+    if not os.path.exists(path + '.gz'):
+        with open(path + '.gz', 'wb') as f:
+            f.write(gz)
+
+    if brotli:
+        br = brotli.compress(raw, quality=11)
+        entry['br_bytes'] = len(br)
+        if not os.path.exists(path + '.br'):
+            with open(path + '.br', 'wb') as f:
+                f.write(br)
+
+    return entry
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def manifest_files(manifest):
+    """Every file a manifest references, including compressed variants"""
+    if not manifest:
+        return set()
+    entries = list(manifest.get('partitions', {}).values())
+    if manifest.get('address_index'):
+        entries.append(manifest['address_index'])
+    files = set()
+    for entry in entries:
+        files.update({entry['file'], entry['file'] + '.gz', entry['file'] + '.br'})
+    return files
+
+def prune_artifacts(out_dir, keep):
+    """
+    Remove hashed artifacts neither the new nor the previous manifest uses
+    Anything else in out_dir is left alone
+    """
+    removed = 0
+    for name in os.listdir(out_dir):
+        if ARTIFACT_NAME.match(name) and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+            removed += 1
+    return removed
+
+def served_bytes(entry):
+    """Transfer size of an artifact - the service worker prefers .br over .gz"""
+    return entry.get('br_bytes', entry['gzip_bytes'])
+
+def update_report(previous, manifest):
+    """
+    Bytes a client that already has the previous manifest must fetch
+    Compared against re-downloading everything (served .br/.gz sizes)
+    """
+    old_parts = previous.get('partitions', {}) if previous else {}
+    new_parts = manifest['partitions']
+    changed = [z for z, e in new_parts.items() if old_parts.get(z, {}).get('hash') != e['hash']]
+    removed = [z for z in old_parts if z not in new_parts]
+
+    entries = list(new_parts.values())
+    changed_entries = [new_parts[z] for z in changed]
+    index = manifest.get('address_index')
+    if index:
+        entries.append(index)
+        if not previous or previous.get('address_index', {}).get('hash') != index['hash']:
+            changed_entries.append(index)
+
+    full = sum(served_bytes(e) for e in entries)
+    fetch = sum(served_bytes(e) for e in changed_entries)
+    return {
+        'changed_partitions': sorted(changed),
+        'removed_partitions': sorted(removed),
+        'encoding': 'br' if brotli else 'gzip',
+        'full_bytes': full,
+        'update_bytes': fetch,
+        'saved_bytes': full - fetch,
+        'saved_pct': (full - fetch) * 100 / full if full else 0.0
+    }
+
+def publish(properties, out_dir, index_path=None):
+    """Write partitions, compressed variants and the manifest; returns (manifest, report)"""
+    os.makedirs(out_dir, exist_ok=True)
+    previous = load_manifest(out_dir)
+
+    partitions = partition_by_zip(properties)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'generated': datetime.now().isoformat(),
+        'total_properties': len(properties),
+        'compression': ['gzip', 'br'] if brotli else ['gzip'],
+        'partitions': {}
+    }
+    for zip_code in sorted(partitions):
+        entry = write_artifact(out_dir, f'properties-{zip_code}', encode_partition(partitions[zip_code]))
+        entry['count'] = len(partitions[zip_code])
+        manifest['partitions'][zip_code] = entry
+
+    # Ship the autocomplete index alongside the data when it has been built
+    if index_path and os.path.exists(index_path):
+        with open(index_path, 'rb') as f:
+            manifest['address_index'] = write_artifact(out_dir, 'address-index', f.read())
+
+    report = update_report(previous, manifest)
+    manifest['update'] = report
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Keep the previous generation so clients mid-update can still finish
+    prune_artifacts(out_dir, manifest_files(manifest) | manifest_files(previous))
+    return manifest, report
+
+def main():
+    parser = argparse.ArgumentParser(description='Publish ZIP-partitioned, precompressed data artifacts')
+    parser.add_argument('--snapshot', default='hayward_properties.json')
+    parser.add_argument('--out', default=os.path.join('data', 'parts'))
+    parser.add_argument('--index', default='address_index.json', help='autocomplete index to publish if present')
+    args = parser.parse_args()
+
+    print("=== LEGACY COMPASS ARTIFACT PUBLISHER ===")
+    with open(args.snapshot, 'r') as f:
+        properties = json.load(f)['properties']
+    print(f"Loaded {len(properties):,} properties from {args.snapshot}")
+    if not brotli:
+        print("⚠️  brotli not installed - publishing gzip only (pip install brotli)")
+
+    manifest, report = publish(properties, args.out, args.index)
+
+    print(f"\n📦 {len(manifest['partitions'])} ZIP partitions written to {args.out}")
+    for zip_code, entry in manifest['partitions'].items():
+        mark = '🔄' if zip_code in report['changed_partitions'] else '  '
+        br = f", br {entry['br_bytes'] / 1024:,.0f} KB" if 'br_bytes' in entry else ''
+        print(f"  {mark} {zip_code}: {entry['count']:>6,} properties | "
+              f"{entry['bytes'] / 1024:,.0f} KB raw, gzip {entry['gzip_bytes'] / 1024:,.0f} KB{br}")
+
+    print("\n📊 UPDATE SIZE")
+    print(f"  Changed partitions: {len(report['changed_partitions'])}")
+    if report['removed_partitions']:
+        print(f"  Removed partitions: {', '.join(report['removed_partitions'])}")
+    print(f"  Full download:   {report['full_bytes'] / 1024:,.0f} KB ({report['encoding']})")
+    print(f"  Update download: {report['update_bytes'] / 1024:,.0f} KB ({report['encoding']})")
+    print(f"  Saved: {report['saved_bytes'] / 1024:,.0f} KB ({report['saved_pct']:.1f}%)")
+
+if __name__ == '__main__':
+    main()
@@ -31,6 +31,28 @@ const urlsToCache = [
 // Offline queue for API calls
 let offlineQueue = [];
 
+// Precompressed siblings of a data partition, best first (manifest 'compression' names)
+const PART_ENCODINGS = [['br', '.br'], ['gzip', '.gz']];
+
+// Fetch a hashed partition via its .br/.gz sibling. _headers serves those with
+// Content-Encoding, so the browser decodes them and we get plain JSON back.
+// Falls back to the bare .json when the sibling is missing.
+function fetchPartition(request, url) {
+  return caches.match('/data/parts/manifest.json')
+    .then(cached => cached ? cached.json() : {})
+    .catch(() => ({}))
+    .then(manifest => {
+      const published = manifest.compression || [];
+      const urls = PART_ENCODINGS
+        .filter(([name]) => published.includes(name))
+        .map(([, suffix]) => url.origin + url.pathname + suffix)
+        .concat(request.url);
+      const tryNext = i => fetch(urls[i]).then(response =>
+        response.ok || i === urls.length - 1 ? response : tryNext(i + 1));
+      return tryNext(0);
+    });
+}
+
 // Install service worker and cache assets
 self.addEventListener('install', event => {
   console.log('[SW] Installing service worker...');
@@ -129,6 +151,33 @@ self.addEventListener('fetch', event => {
     return;
   }
 
+  // Published data partitions - manifest is network-first, hashed parts never change
+  if (url.pathname.startsWith('/data/parts/')) {
+    if (url.pathname.endsWith('/manifest.json')) {
+      event.respondWith(
+        fetch(request)
+          .then(response => {
+            const responseToCache = response.clone();
+            caches.open(DATA_CACHE_NAME).then(cache => cache.put(request, responseToCache));
+            return response;
+          })
+          .catch(() => caches.match(request))
+      );
+    } else {
+      event.respondWith(
+        caches.open(DATA_CACHE_NAME).then(cache =>
+          cache.match(request).then(cached => cached || fetchPartition(request, url).then(response => {
+            if (response.status === 200) {
+              cache.put(request, response.clone());
+            }
+            return response;
+          }))
+        )
+      );
+    }
+    return;
+  }
+
   // Handle Mapbox tiles with intelligent caching
   if (url.hostname.includes('mapbox')) {
     event.respondWith(
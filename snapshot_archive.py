@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Monthly Snapshot Archive for Legacy Compass
+Keeps every monthly county snapshot for value-trend and turnover analysis
+without storing a full copy each month.
+
+Layout (snapshot_archive/):
+  catalog.json            months in order, which file holds each one
+  base_YYYY-MM.npz        full columnar snapshot, every BASE_INTERVAL months
+  delta_YYYY-MM.npz       changes vs the previous month, keyed by APN:
+                          added rows, removed APNs, and per-column (apn, value) pairs
+
+Any month is rebuilt from its base plus at most BASE_INTERVAL-1 deltas, each
+applied with vectorized NumPy ops. Per-parcel time series (e.g. total_value
+for every parcel across every month) come from one forward walk.
+
+Usage:
+  python snapshot_archive.py add 2026-01 [--snapshot hayward_properties.json]
+  python snapshot_archive.py show 2026-01 [--apn 415-0150-012-00]
+  python snapshot_archive.py trend [--column total_value] [--from 2025-01] [--to 2026-01]
+  python snapshot_archive.py stats
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+ARCHIVE_DIR = 'snapshot_archive'
+BASE_INTERVAL = 12
+
+# Fields parse_county_csv() extracts (plus the merge flags), grouped by storage type
+NUMERIC_FIELDS = ['latitude', 'longitude', 'land_value', 'improvement_value', 'total_value']
+BOOL_FIELDS = ['is_absentee', 'is_vacant']
+TEXT_FIELDS = ['property_address', 'property_address_raw', 'zip_code',
+               'owner_name', 'owner_mailing_address']
+FIELDS = NUMERIC_FIELDS + BOOL_FIELDS + TEXT_FIELDS
+
+MONTH_RE = re.compile(r'^\d{4}-\d{2}$')
+
+def columns_from_properties(properties):
+    """Processed property dicts to APN-sorted column arrays"""
+    apn = np.array([p['apn'] for p in properties], dtype=str)
+    cols = {'apn': apn}
+    for f in NUMERIC_FIELDS:
+        cols[f] = np.array([p.get(f) if p.get(f) is not None else np.nan for p in properties], dtype=float)
+    for f in BOOL_FIELDS:
+        cols[f] = np.array([bool(p.get(f)) for p in properties], dtype=bool)
+    for f in TEXT_FIELDS:
+        cols[f] = np.array([p.get(f) or '' for p in properties], dtype=str)
+    order = np.argsort(apn, kind='stable')
+    return {k: v[order] for k, v in cols.items()}
+
+def changed_mask(old, new):
+    """Elementwise 'value changed', treating NaN == NaN"""
+    if old.dtype.kind == 'f':
+        return (old != new) & ~(np.isnan(old) & np.isnan(new))
+    return old != new
+
+def make_delta(prev, cur):
+    """
+    Columnar delta between two APN-sorted snapshots
+    Only changed cells are stored, each as an (apn, value) pair per column
+    """
+    _, prev_idx, cur_idx = np.intersect1d(prev['apn'], cur['apn'], assume_unique=True, return_indices=True)
+    delta = {
+        'removed_apn': np.setdiff1d(prev['apn'], cur['apn'], assume_unique=True),
+    }
+    added = ~np.isin(cur['apn'], prev['apn'], assume_unique=True)
+    for k, v in cur.items():
+        delta[f'added_{k}'] = v[added]
+    for f in FIELDS:
+        mask = changed_mask(prev[f][prev_idx], cur[f][cur_idx])
+        delta[f'apn_{f}'] = cur['apn'][cur_idx][mask]
+        delta[f'val_{f}'] = cur[f][cur_idx][mask]
+    return delta
+
+def apply_delta(state, delta):
+    """Roll an APN-sorted snapshot forward by one month"""
+    keep = ~np.isin(state['apn'], delta['removed_apn'], assume_unique=True)
+    state = {k: v[keep].copy() for k, v in state.items()}
+    for f in [f for f in FIELDS if f in state]:
+        apns = delta[f'apn_{f}']
+        if len(apns):
+            pos = np.searchsorted(state['apn'], apns)
+            if state[f].dtype.kind == 'U' and delta[f'val_{f}'].dtype.itemsize > state[f].dtype.itemsize:
+                state[f] = state[f].astype(delta[f'val_{f}'].dtype)
+            state[f][pos] = delta[f'val_{f}']
+    if len(delta['added_apn']):
+        state = {k: np.concatenate([v, delta[f'added_{k}']]) for k, v in state.items()}
+        order = np.argsort(state['apn'], kind='stable')
+        state = {k: v[order] for k, v in state.items()}
+    return state
+
+class SnapshotArchive:
+    """Base + delta archive with time-travel reads"""
+
+    def __init__(self, archive_dir=ARCHIVE_DIR):
+        self.dir = archive_dir
+        os.makedirs(archive_dir, exist_ok=True)
+        self.catalog_path = os.path.join(archive_dir, 'catalog.json')
+        if os.path.exists(self.catalog_path):
+            with open(self.catalog_path, 'r') as f:
+                self.catalog = json.load(f)
+        else:
+            self.catalog = {'months': []}
+        self._cache = {}
+
+    @property
+    def months(self):
+        return [m['month'] for m in self.catalog['months']]
+
+    def _load(self, entry, fields=None):
+        """Load a base or delta file; npz members are read lazily, so `fields` skips the rest"""
+        with np.load(os.path.join(self.dir, entry['file'])) as data:
+            if fields is None:
+                return {k: data[k] for k in data.files}
+            wanted = {'apn', 'removed_apn', 'added_apn'}
+            for f in fields:
+                wanted.update({f, f'added_{f}', f'apn_{f}', f'val_{f}'})
+            return {k: data[k] for k in data.files if k in wanted}
+
+    def _save_catalog(self):
+        tmp = self.catalog_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.catalog, f, indent=2)
+        os.replace(tmp, self.catalog_path)
+
+    def add_month(self, month, properties):
+        """Archive one month's processed snapshot as a base or a delta"""
+        if not MONTH_RE.match(month):
+            raise ValueError(f"Month must look like YYYY-MM, got {month!r}")
+        if self.months and month <= self.months[-1]:
+            raise ValueError(f"{month} is not after the last archived month {self.months[-1]}")
+
+        cur = columns_from_properties(properties)
+        since_base = 0
+        for entry in reversed(self.catalog['months']):
+            if entry['kind'] == 'base':
+                break
+            since_base += 1
+
+        if not self.catalog['months'] or since_base + 1 >= BASE_INTERVAL:
+            kind, arrays = 'base', cur
+        else:
+            kind, arrays = 'delta', make_delta(self.read(self.months[-1]), cur)
+
+        filename = f'{kind}_{month}.npz'
+        np.savez_compressed(os.path.join(self.dir, filename), **arrays)
+        self.catalog['months'].append({
+            'month': month,
+            'kind': kind,
+            'file': filename,
+            'parcels': int(len(cur['apn'])),
+            'bytes': os.path.getsize(os.path.join(self.dir, filename))
+        })
+        self._save_catalog()
+        self._cache = {month: cur}
+        return kind
+
+    def read(self, month):
+        """Reconstruct the full columnar snapshot for one month"""
+        if month in self._cache:
+            return self._cache[month]
+        if month not in self.months:
+            raise KeyError(f"{month} is not in the archive")
+
+        target = self.months.index(month)
+        start = target
+        while self.catalog['months'][start]['kind'] != 'base':
+            start -= 1
+        state = self._load(self.catalog['months'][start])
+        for entry in self.catalog['months'][start + 1:target + 1]:
+            state = apply_delta(state, self._load(entry))
+        self._cache[month] = state
+        return state
+
+    def walk(self, start=None, end=None, fields=None):
+        """
+        Yield (month, snapshot) in order, applying each delta once
+        Pass `fields` to carry only those columns (plus apn)
+        """
+        state = None
+        for entry in self.catalog['months']:
+            month = entry['month']
+            if end and month > end:
+                break
+            if entry['kind'] == 'base':
+                state = self._load(entry, fields)
+            elif state is None:
+                state = self.read(month)
+                if fields is not None:
+                    state = {k: v for k, v in state.items() if k == 'apn' or k in fields}
+            else:
+                state = apply_delta(state, self._load(entry, fields))
+            if not start or month >= start:
+                yield month, state
+
+    def series(self, column, start=None, end=None):
+        """
+        Per-parcel time series for one numeric column
+        Returns (apns, months, matrix) with NaN where a parcel didn't exist
+        """
+        if column not in NUMERIC_FIELDS:
+            raise ValueError(f"{column} is not a numeric field ({', '.join(NUMERIC_FIELDS)})")
+        snapshots = list(self.walk(start, end, [column]))
+        if not snapshots:
+            return np.array([], dtype=str), [], np.empty((0, 0))
+        apns = np.unique(np.concatenate([s['apn'] for _, s in snapshots]))
+        matrix = np.full((len(apns), len(snapshots)), np.nan)
+        for j, (_, snap) in enumerate(snapshots):
+            matrix[np.searchsorted(apns, snap['apn']), j] = snap[column]
+        return apns, [m for m, _ in snapshots], matrix
+
+def appreciation(matrix):
+    """First-to-last change per parcel, NaN where either end is missing or zero"""
+    first, last = matrix[:, 0], matrix[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(first > 0, (last - first) / first * 100, np.nan)
+    return pct
+
+def main():
+    parser = argparse.ArgumentParser(description='Delta-encoded monthly snapshot archive')
+    parser.add_argument('mode', choices=['add', 'show', 'trend', 'stats'])
+    parser.add_argument('month', nargs='?')
+    parser.add_argument('--dir', default=ARCHIVE_DIR)
+    parser.add_argument('--snapshot', default='hayward_properties.json')
+    parser.add_argument('--apn', default=None)
+    parser.add_argument('--column', default='total_value')
+    parser.add_argument('--from', dest='start', default=None)
+    parser.add_argument('--to', dest='end', default=None)
+    args = parser.parse_args()
+
+    archive = SnapshotArchive(args.dir)
+
+    if args.mode == 'add':
+        if not args.month:
+            parser.error('add needs a month (YYYY-MM)')
+        with open(args.snapshot, 'r') as f:
+            properties = json.load(f)['properties']
+        kind = archive.add_month(args.month, properties)
+        entry = archive.catalog['months'][-1]
+        print(f"✅ Archived {args.month} as {kind} ({entry['parcels']:,} parcels, {entry['bytes'] / 1024:,.0f} KB)")
+
+    elif args.mode == 'show':
+        month = args.month or archive.months[-1]
+        start = time.perf_counter()
+        snap = archive.read(month)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"📅 {month}: {len(snap['apn']):,} parcels (rebuilt in {elapsed:.0f} ms)")
+        if args.apn:
+            i = np.searchsorted(snap['apn'], args.apn)
+            if i < len(snap['apn']) and snap['apn'][i] == args.apn:
+                for f in FIELDS:
+                    print(f"  {f}: {snap[f][i]}")
+            else:
+                print(f"  APN {args.apn} not in {month}")
+
+    elif args.mode == 'trend':
+        start = time.perf_counter()
+        apns, months, matrix = archive.series(args.column, args.start, args.end)
+        pct = appreciation(matrix) if len(months) > 1 else np.array([])
+        elapsed = (time.perf_counter() - start) * 1000
+        valid = pct[~np.isnan(pct)]
+        print(f"📈 {args.column}: {len(apns):,} parcels over {len(months)} months ({elapsed:.0f} ms)")
+        if len(valid):
+            print(f"  {months[0]} → {months[-1]}")
+            print(f"  Median change: {np.median(valid):+.1f}%")
+            print(f"  Mean change: {np.mean(valid):+.1f}%")
+            print(f"  Parcels up / down / flat: {(valid > 0).sum():,} / {(valid < 0).sum():,} / {(valid == 0).sum():,}")
+            totals = np.nansum(matrix, axis=0)
+            for m, t in zip(months, totals):
+                print(f"  {m}: ${t:,.0f}")
+
+    else:
+        entries = archive.catalog['months']
+        stored = sum(e['bytes'] for e in entries)
+        bases = [e for e in entries if e['kind'] == 'base']
+        full = sum(e['bytes'] for e in bases) / len(bases) * len(entries) if bases else 0
+        print(f"🗄️  {len(entries)} months ({len(bases)} bases, {len(entries) - len(bases)} deltas)")
+        print(f"  Stored: {stored / 1024:,.0f} KB")
+        print(f"  Full copies would be ~{full / 1024:,.0f} KB")
+
+if __name__ == '__main__':
+    main()
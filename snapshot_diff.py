@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Offline County Snapshot Diff for Legacy Compass
+Compares two county exports (last month vs this month) without touching the database.
+
+Both files are sorted by APN with an external merge sort - sorted runs are
+spilled to a temp directory - then streamed through a merge-join. Memory stays
+bounded by RUN_SIZE no matter how big the county file is.
+
+Usage: python snapshot_diff.py <old_county_csv> <new_county_csv> [--out changes.jsonl]
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+RUN_SIZE = 200000       # records held in memory per sorted run
+MERGE_FAN_IN = 64       # runs merged at once
+VALUE_CHANGE_MIN = 1000 # same threshold monthly_update.py uses
+
+CHANGE_TYPES = ['new_properties', 'removed_properties', 'title_transfers',
+                'value_changes', 'vacant_changes']
+
+def to_float(value):
+    """Parse a county number, treating blanks and junk as 0"""
+    try:
+        return float(value or 0)
+    except ValueError:
+        return 0.0
+
+def extract_record(row):
+    """
+    Pull the fields we diff on out of a county row
+    Returns a flat list so runs spill to disk as plain CSV
+    """
+    street_address = f"{row.get('SitusStreetNumber', '').strip()} {row.get('SitusStreetName', '').strip()}".strip()
+    address = row.get('SitusAddress', '').strip() or street_address
+
+    land = to_float(row.get('Land'))
+    imps = to_float(row.get('Imps'))
+    total = to_float(row.get('TotalValue')) if row.get('TotalValue') else land + imps
+
+    # Processed exports carry is_vacant; raw county rows only tell us there are no improvements
+    if 'is_vacant' in row:
+        vacant = str(row['is_vacant']).lower() == 'true'
+    else:
+        vacant = land > 0 and imps == 0
+
+    return [
+        row.get('APN', row.get('apn', '')).strip(),
+        address,
+        (row.get('OwnerName') or row.get('owner_name') or '').strip(),
+        repr(total),
+        '1' if vacant else '0'
+    ]
+
+def read_records(csv_path, city='HAYWARD'):
+    """Stream diff records out of a county CSV"""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            if city and city not in row.get('SitusCity', row.get('city', '')).upper():
+                continue
+            record = extract_record(row)
+            if record[0]:
+                yield record
+
+def write_run(records, run_dir, run_num):
+    """Sort one in-memory batch by APN and spill it to disk"""
+    records.sort(key=lambda r: r[0])
+    path = os.path.join(run_dir, f'run_{run_num:05d}.csv')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(records)
+    return path
+
+def read_run(path):
+    """Stream records back out of a spilled run"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.reader(f)
+
+def merge_runs(paths, run_dir, run_num):
+    """Merge a group of runs into one bigger sorted run"""
+    out = os.path.join(run_dir, f'run_{run_num:05d}.csv')
+    with open(out, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(heapq.merge(*[read_run(p) for p in paths], key=lambda r: r[0]))
+    for p in paths:
+        os.remove(p)
+    return out
+
+def external_sort(records, run_dir, run_size=RUN_SIZE):
+    """
+    Sort a record stream by APN using bounded memory
+    Yields sorted records, keeping only the last record for a repeated APN
+    """
+    runs = []
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= run_size:
+            runs.append(write_run(batch, run_dir, len(runs)))
+            batch = []
+    if batch or not runs:
+        runs.append(write_run(batch, run_dir, len(runs)))
+    batch = None  # let the last run go before merging
+
+    # Multi-pass merge so we never hold more than MERGE_FAN_IN files open
+    run_num = len(runs)
+    while len(runs) > MERGE_FAN_IN:
+        merged = []
+        for i in range(0, len(runs), MERGE_FAN_IN):
+            merged.append(merge_runs(runs[i:i+MERGE_FAN_IN], run_dir, run_num))
+            run_num += 1
+        runs = merged
+
+    # heapq.merge is stable across runs, so the last duplicate is the latest row
+    previous = None
+    for record in heapq.merge(*[read_run(p) for p in runs], key=lambda r: r[0]):
+        if previous is not None and previous[0] != record[0]:
+            yield previous
+        previous = record
+    if previous is not None:
+        yield previous
+
+def diff_sorted(old_records, new_records):
+    """
+    Merge-join two APN-sorted streams
+    Yields (change_type, details) tuples
+    """
+    sentinel = None
+    old = next(old_records, sentinel)
+    new = next(new_records, sentinel)
+
+    while old is not sentinel or new is not sentinel:
+        if new is sentinel or (old is not sentinel and old[0] < new[0]):
+            yield 'removed_properties', {'apn': old[0], 'address': old[1], 'owner': old[2]}
+            old = next(old_records, sentinel)
+        elif old is sentinel or new[0] < old[0]:
+            yield 'new_properties', {'apn': new[0], 'address': new[1], 'owner': new[2]}
+            new = next(new_records, sentinel)
+        else:
+            apn, address = new[0], new[1] or old[1]
+            if new[2] and new[2] != old[2]:
+                yield 'title_transfers', {
+                    'apn': apn,
+                    'address': address,
+                    'old_owner': old[2],
+                    'new_owner': new[2]
+                }
+            old_value, new_value = float(old[3]), float(new[3])
+            if new_value > 0 and abs(new_value - old_value) > VALUE_CHANGE_MIN:
+                yield 'value_changes', {
+                    'apn': apn,
+                    'address': address,
+                    'old_value': old_value,
+                    'new_value': new_value,
+                    'change': new_value - old_value
+                }
+            if new[4] != old[4]:
+                yield 'vacant_changes', {
+                    'apn': apn,
+                    'address': address,
+                    'was_vacant': old[4] == '1',
+                    'is_vacant': new[4] == '1'
+                }
+            old = next(old_records, sentinel)
+            new = next(new_records, sentinel)
+
+def diff_snapshots(old_csv, new_csv, out_path, city='HAYWARD', run_size=RUN_SIZE, tmp_dir=None):
+    """
+    Diff two county exports file-to-file
+    Changes are written as JSON lines; returns counts per change type
+    """
+    counts = {change: 0 for change in CHANGE_TYPES}
+    work_dir = tempfile.mkdtemp(prefix='snapshot_diff_', dir=tmp_dir)
+    try:
+        old_dir = os.path.join(work_dir, 'old')
+        new_dir = os.path.join(work_dir, 'new')
+        os.makedirs(old_dir)
+        os.makedirs(new_dir)
+
+        old_sorted = external_sort(read_records(old_csv, city), old_dir, run_size)
+        new_sorted = external_sort(read_records(new_csv, city), new_dir, run_size)
+
+        with open(out_path, 'w', encoding='utf-8') as out:
+            for change, details in diff_sorted(old_sorted, new_sorted):
+                counts[change] += 1
+                # 'type' goes last: value-change details carry their own numeric 'change'
+                out.write(json.dumps({**details, 'type': change}) + '\n')
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff two county snapshots by APN without a database')
+    parser.add_argument('old_csv', help='last month county export')
+    parser.add_argument('new_csv', help='this month county export')
+    parser.add_argument('--out', default=f'snapshot_diff_{datetime.now().strftime("%Y%m%d")}.jsonl')
+    parser.add_argument('--city', default='HAYWARD', help="SitusCity filter ('' for the whole county)")
+    parser.add_argument('--run-size', type=int, default=RUN_SIZE)
+    parser.add_argument('--tmp-dir', default=None, help='where sorted runs are spilled')
+    args = parser.parse_args()
+
+    print(f"🔄 SNAPSHOT DIFF - {os.path.basename(args.old_csv)} → {os.path.basename(args.new_csv)}")
+    print("=" * 60)
+
+    start = datetime.now()
+    counts = diff_snapshots(args.old_csv, args.new_csv, args.out, args.city.upper(),
+                            args.run_size, args.tmp_dir)
+    elapsed = (datetime.now() - start).total_seconds()
+
+    print("\n📊 DIFF SUMMARY")
+    print("-" * 60)
+    print(f"🆕 New Properties: {counts['new_properties']}")
+    print(f"🗑️  Removed Properties: {counts['removed_properties']}")
+    print(f"🏠 Title Transfers: {counts['title_transfers']}")
+    print(f"💰 Value Changes: {counts['value_changes']}")
+    print(f"🏚️  Vacancy Changes: {counts['vacant_changes']}")
+    print(f"\n⏱️  {elapsed:.1f}s - changes written to {args.out}")
+
+if __name__ == '__main__':
+    main()
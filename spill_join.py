@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Spilling Hash Join for Legacy Compass
+merge_data() probes plain dicts built from the owner and vacant lists. That's
+fine for Hayward's 68k owner rows but not for county-wide or multi-county
+files with millions of rows.
+
+HashLookup is the build side of the join: it stays an ordinary dict until it
+holds more than budget_rows keys, then hash-partitions everything it has (and
+every later row) into SPILL_PARTITIONS files on disk. Probing is grace-hash
+style: the probe keys are partitioned the same way and each build partition is
+streamed once, keeping only the rows whose key is wanted.
+
+merge_with_budget() uses it to shrink the owner and vacant lookups to the
+county's addresses and APNs, then calls merge_data() itself, so the merged
+properties are identical to the in-memory path.
+
+Usage:
+  python spill_join.py bench [--scale 68000 --scale 2000000] [--budget 500000]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from process_county_data import (iter_owner_rows, iter_vacant_rows, load_hayward_owners, load_jeff_vacant,
+                                 merge_data, normalize_address, normalize_apn)
+
+JOIN_BUDGET_ROWS = 1000000
+SPILL_PARTITIONS = 64
+
+class HashLookup:
+    """Key -> value build side that spills to partition files past a row budget"""
+
+    def __init__(self, budget_rows=JOIN_BUDGET_ROWS, partitions=SPILL_PARTITIONS, tmp_dir=None):
+        self.budget_rows = budget_rows
+        self.partitions = partitions
+        self.tmp_dir = tmp_dir
+        self.table = {}
+        self.spill_dir = None
+        self.files = None
+        self.rows = 0
+
+    @property
+    def spilled(self):
+        return self.spill_dir is not None
+
+    def _partition(self, key):
+        return hash(key) % self.partitions
+
+    def _spill(self):
+        """Move the in-memory table to partition files; later adds go straight to disk"""
+        self.spill_dir = tempfile.mkdtemp(prefix='spill_join_', dir=self.tmp_dir)
+        self.files = [open(os.path.join(self.spill_dir, f'part_{i:03d}.jsonl'), 'w', encoding='utf-8')
+                      for i in range(self.partitions)]
+        for key, value in self.table.items():
+            self._write(key, value)
+        self.table = {}
+
+    def _write(self, key, value):
+        self.files[self._partition(key)].write(json.dumps([key, value], separators=(',', ':')) + '\n')
+
+    def add(self, key, value=True):
+        """Later values for a key replace earlier ones, as with a dict"""
+        self.rows += 1
+        if self.spill_dir:
+            self._write(key, value)
+            return
+        self.table[key] = value
+        if len(self.table) > self.budget_rows:
+            self._spill()
+
+    def probe(self, keys):
+        """Matches for a batch of keys as a plain {key: value} dict"""
+        if not self.spilled:
+            return {k: self.table[k] for k in keys if k in self.table}
+
+        wanted = [set() for _ in range(self.partitions)]
+        for key in keys:
+            wanted[self._partition(key)].add(key)
+        for f in self.files:
+            f.flush()
+
+        matches = {}
+        decoder = json.JSONDecoder()
+        for i, keys_here in enumerate(wanted):
+            if not keys_here:
+                continue
+            with open(self.files[i].name, 'r', encoding='utf-8') as f:
+                for line in f:
+                    # Lines are '[key,value]' - decode the key alone, values only on a match
+                    key, end = decoder.raw_decode(line, 1)
+                    if key in keys_here:
+                        # Rows are in input order, so the last one wins like the dict
+                        matches[key] = json.loads(line[end + 1:line.rindex(']')])
+        return matches
+
+    def close(self):
+        if self.files:
+            for f in self.files:
+                f.close()
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+        self.spill_dir = self.files = None
+        self.table = {}
+
+def merge_with_budget(county_properties, owners_file, vacant_file, budget_rows=JOIN_BUDGET_ROWS, tmp_dir=None):
+    """
+    merge_data() for owner/vacant lists of any size
+    Each lookup keeps at most budget_rows keys in memory before spilling
+    """
+    owners = HashLookup(budget_rows, tmp_dir=tmp_dir)
+    vacant_apns = HashLookup(budget_rows, tmp_dir=tmp_dir)
+    vacant_addresses = HashLookup(budget_rows, tmp_dir=tmp_dir)
+    try:
+        for addr, owner in iter_owner_rows(owners_file):
+            owners.add(addr, owner)
+        for apn, addr in iter_vacant_rows(vacant_file):
+            if apn:
+                vacant_apns.add(normalize_apn(apn))
+            if addr:
+                vacant_addresses.add(addr)
+
+        spilled = [name for name, lookup in
+                   (('owners', owners), ('vacant APNs', vacant_apns), ('vacant addresses', vacant_addresses))
+                   if lookup.spilled]
+        if spilled:
+            print(f"💾 Over the {budget_rows:,}-row budget, joined on disk: {', '.join(spilled)}")
+
+        addresses = {p['property_address'] for p in county_properties.values()}
+        owners_by_address = owners.probe(addresses)
+        vacant_keys = set(vacant_apns.probe({normalize_apn(apn) for apn in county_properties}))
+        vacant_by_address = vacant_addresses.probe(addresses)
+    finally:
+        owners.close()
+        vacant_apns.close()
+        vacant_addresses.close()
+
+    return merge_data(county_properties, owners_by_address, vacant_keys, vacant_by_address)
+
+def write_bench_files(out_dir, rows, county_rows):
+    """Synthetic owner/vacant lists; county parcels reuse a random subset of the addresses"""
+    streets = ['MISSION BLVD', 'TENNYSON RD', 'A ST', 'JACKSON ST', 'HESPERIAN BLVD', 'WINTON AVE']
+    owners_file = os.path.join(out_dir, 'owners.csv')
+    with open(owners_file, 'w', encoding='utf-8') as f:
+        f.write('property_address,owner_name,owner_mailing_address,is_absentee\n')
+        for i in range(rows):
+            addr = f"{i} {streets[i % len(streets)]}"
+            f.write(f"{addr},OWNER {i},{i} MAIL ST,{'true' if i % 7 == 0 else 'false'}\n")
+
+    vacant_file = os.path.join(out_dir, 'vacant.csv')
+    with open(vacant_file, 'w', encoding='utf-8') as f:
+        f.write('Table 1\nAPN - FORMATTED,OWNER STATUS,FIRST,LAST,SITUS STREET ADDRESS,CITY\n')
+        for i in range(0, rows, 50):
+            f.write(f"{i // 1000 % 1000}-{i % 1000 // 10}-{i % 10},A,X,Y,"
+                    f"{i + 1} {streets[(i + 1) % len(streets)]},Hayward,CA\n")
+
+    county = {}
+    for i in random.Random(42).sample(range(rows * 2), county_rows):
+        apn = f"{i // 1000 % 1000:03d}-{i % 1000 // 10:04d}-{i % 10:03d}-00"
+        county[apn] = {'apn': apn, 'property_address': normalize_address(f"{i} {streets[i % len(streets)]}"),
+                       'owner_name': None, 'owner_mailing_address': '', 'is_absentee': False, 'is_vacant': False}
+    return owners_file, vacant_file, county
+
+def bench(scales, budget_rows, county_rows):
+    tmp = tempfile.mkdtemp(prefix='spill_join_bench_')
+    try:
+        for rows in scales:
+            owners_file, vacant_file, county = write_bench_files(tmp, rows, min(county_rows, rows))
+            print(f"\n📦 {rows:,} owner rows, {len(county):,} county parcels, budget {budget_rows:,} rows")
+
+            start = time.perf_counter()
+            fresh = json.loads(json.dumps(county))
+            expected = merge_data(fresh, load_hayward_owners(owners_file), *load_jeff_vacant(vacant_file))
+            in_memory = time.perf_counter() - start
+
+            start = time.perf_counter()
+            fresh = json.loads(json.dumps(county))
+            result = merge_with_budget(fresh, owners_file, vacant_file, budget_rows, tmp)
+            spilling = time.perf_counter() - start
+
+            print(f"  In-memory dicts:  {in_memory:6.2f}s  {rows / in_memory:>12,.0f} rows/s")
+            print(f"  Budgeted join:    {spilling:6.2f}s  {rows / spilling:>12,.0f} rows/s")
+            print(f"  {'✅ Results identical' if result == expected else '❌ Results differ'}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory-budgeted owner/vacant join')
+    parser.add_argument('mode', choices=['bench'])
+    parser.add_argument('--scale', type=int, action='append', help='owner rows per run (repeatable)')
+    parser.add_argument('--budget', type=int, default=500000, help='max keys held in memory per lookup')
+    parser.add_argument('--county-rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    bench(args.scale or [68000, 2000000], args.budget, args.county_rows)
+
+if __name__ == '__main__':
+    main()